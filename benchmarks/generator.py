@@ -0,0 +1,138 @@
+import random
+import sys
+
+ARRAY_SIZE = "ARRAY_SIZE"
+
+SHAPES = {
+    "functions": dict(functions=200, depth=1, statements=4, expression_length=3),
+    "nesting": dict(functions=8, depth=10, statements=1, expression_length=3, nesting=1.0),
+    "expressions": dict(functions=20, depth=1, statements=6, expression_length=60),
+    "arrays": dict(functions=20, depth=1, statements=3, expression_length=3, array_size=1000),
+    "comments": dict(functions=20, depth=1, statements=3, expression_length=3, comment_size=20000),
+    "mixed": dict(functions=30, depth=4, statements=3, expression_length=8, array_size=32, comment_size=500),
+}
+
+
+class ProgramGenerator:
+    def __init__(self, functions=10, depth=2, statements=4, expression_length=4, array_size=8, comment_size=0,
+                 nesting=0.5, seed=0):
+        self.functions = functions
+        self.depth = depth
+        self.statements = statements
+        self.expression_length = expression_length
+        self.array_size = array_size
+        self.comment_size = comment_size
+        self.nesting = nesting
+        self.random = random.Random(seed)
+        self.lines = []
+        self.loops = 0
+        self.max_index = 0
+
+    def emit(self, indent, text):
+        self.lines.append("    " * indent + text)
+
+    def comment(self):
+        if self.comment_size == 0:
+            return
+        words = []
+        length = 0
+        while length < self.comment_size:
+            word = self.random.choice(["repeat", "until", "x", "=", "42", "if", "*", "/", "else", "\n"])
+            words.append(word)
+            length += len(word) + 1
+        self.emit(0, "/* " + " ".join(words) + " */")
+
+    def factor(self, function):
+        choice = self.random.randrange(5)
+        if choice == 0:
+            return str(self.random.randrange(1000))
+        if choice == 1:
+            return f"t[{self.random.randrange(self.array_size)}]"
+        if choice == 2 and function > 0:
+            return f"f{self.random.randrange(function)}({self.expression(function, 2)}, t)"
+        return self.random.choice(["a", "s", "i", "b[i]"])
+
+    def expression(self, function, length=None):
+        length = self.expression_length if length is None else length
+        terms = [self.factor(function)]
+        for _ in range(length - 1):
+            operator = self.random.choice(["+", "-", "*", "+", "-"])
+            terms.append(operator)
+            terms.append(self.factor(function))
+        if length > 4 and self.random.randrange(3) == 0:
+            middle = len(terms) // 2 & ~1
+            return f"({' '.join(terms[:middle + 1])}) {' '.join(terms[middle + 1:])}"
+        return " ".join(terms)
+
+    def statement(self, function, indent, depth, in_loop):
+        if depth > 0 and self.random.random() < self.nesting:
+            choice = self.random.randrange(3, 6)
+        else:
+            choice = self.random.randrange(3)
+        if choice == 0:
+            self.emit(indent, f"s = {self.expression(function)};")
+        elif choice == 1:
+            self.emit(indent, f"t[{self.random.randrange(self.array_size)}] = {self.expression(function)};")
+        elif choice == 2:
+            self.emit(indent, f"output({self.expression(function)});")
+        elif choice in (3, 4):
+            self.emit(indent, f"if ({self.expression(function)} < {self.expression(function)}) {{")
+            self.block(function, indent + 1, depth - 1, in_loop)
+            self.emit(indent, "} else {")
+            self.block(function, indent + 1, depth - 1, in_loop)
+            self.emit(indent, "}")
+        else:
+            self.loops += 1
+            self.emit(indent, "repeat {")
+            self.block(function, indent + 1, depth - 1, True)
+            self.emit(indent + 1, "i = i + 1;")
+            if self.random.randrange(2):
+                self.emit(indent + 1, "if (s == 7) break; else ;")
+            self.emit(indent, f"}} until ({self.random.randrange(2, 6)} < i)")
+
+    def block(self, function, indent, depth, in_loop):
+        for _ in range(self.statements):
+            self.statement(function, indent, depth, in_loop)
+
+    def function(self, function):
+        self.comment()
+        self.emit(0, f"int f{function}(int a, int b[]) {{")
+        self.emit(1, f"int i; int s; int t[{ARRAY_SIZE}];")
+        self.emit(1, "i = 0; s = a;")
+        self.loops = 0
+        self.block(function, 1, self.depth, False)
+        # i only grows and counts loop iterations; a loop repeats only while i <= 5, so
+        # a call runs at most 6 * loops iterations and b[i] stays inside the arrays.
+        self.max_index = max(self.max_index, 6 * self.loops)
+        self.emit(1, "return s;")
+        self.emit(0, "}")
+
+    def main(self):
+        self.comment()
+        self.emit(0, "void main(void) {")
+        self.emit(1, f"int i; int a; int s; int t[{ARRAY_SIZE}];")
+        self.emit(1, "i = 0; a = 1; s = 2;")
+        for function in range(self.functions):
+            self.emit(1, f"output(f{function}({function}, t));")
+        self.emit(0, "}")
+
+    def generate(self):
+        self.lines = []
+        self.max_index = 0
+        for function in range(self.functions):
+            self.function(function)
+        self.main()
+        array_size = str(max(self.array_size, self.max_index + 1))
+        return "\n".join(line.replace(ARRAY_SIZE, array_size) for line in self.lines) + "\n"
+
+
+def generate_program(shape="mixed", scale=1.0, seed=0):
+    options = dict(SHAPES[shape])
+    options["functions"] = max(1, int(options["functions"] * scale))
+    return ProgramGenerator(seed=seed, **options).generate()
+
+
+if __name__ == "__main__":
+    shape = sys.argv[1] if len(sys.argv) > 1 else "mixed"
+    scale = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    sys.stdout.write(generate_program(shape, scale))
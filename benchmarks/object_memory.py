@@ -0,0 +1,72 @@
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from utils import *
+from scanner import Scanner, Token, CHUNK_SIZE
+from symbol_table import SymbolTableEntry
+from pb import Instruction
+from semantic_stack import StackEntry, BackpatchFrame
+from parser_module import Parser, load_parse_table
+from generator import ProgramGenerator
+
+COUNT = 200000
+
+SAMPLES = [
+    (Token, (TokenType.ID, "value", 1)),
+    (SymbolTableEntry, ("value", "int", "10000", 1)),
+    (Instruction, (Operation.Add, "10000", "#4", "10004")),
+    (StackEntry, ("10000", "")),
+    (BackpatchFrame, ("main",)),
+]
+
+
+def without_slots(cls):
+    return type(cls.__name__, (), {"__init__": cls.__init__})
+
+
+def measure_allocation(cls, args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    objects = [cls(*args) for _ in range(COUNT)]
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return size / COUNT, elapsed
+
+
+def write_program(filename, functions):
+    with open(filename, "w") as f:
+        f.write(ProgramGenerator(functions=functions, depth=2, statements=3).generate())
+
+
+def measure_compile(filename, parse_table):
+    tracemalloc.start()
+    start = time.perf_counter()
+    parser = Parser(Scanner(filename, chunk_size=CHUNK_SIZE), None, parse_table, build_tree=False)
+    parser.parse()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return len(parser.code_generator.program_block), peak, elapsed
+
+
+if __name__ == "__main__":
+    print(f"{'class':<18}{'slots B/obj':>12}{'dict B/obj':>12}{'slots ms':>10}{'dict ms':>10}")
+    for cls, args in SAMPLES:
+        slots_size, slots_time = measure_allocation(cls, args)
+        dict_size, dict_time = measure_allocation(without_slots(cls), args)
+        print(f"{cls.__name__:<18}{slots_size:>12.1f}{dict_size:>12.1f}{slots_time * 1000:>10.1f}{dict_time * 1000:>10.1f}")
+
+    functions = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    filename = os.path.join(tempfile.gettempdir(), "object_memory_input.txt")
+    write_program(filename, functions)
+    instructions, peak, elapsed = measure_compile(filename, load_parse_table())
+    print(f"compile of {functions} functions: {instructions} instructions, peak {peak / 1024:.0f} KiB, {elapsed:.2f}s")
@@ -0,0 +1,147 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from scanner import Scanner, CHUNK_SIZE
+from parser_module import Parser, load_parse_table
+from compiler import compile_program
+from generator import SHAPES, generate_program
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+METRICS = ["scan_tokens_per_s", "parse_tokens_per_s", "codegen_instructions_per_s", "end_to_end_bytes_per_s"]
+
+
+def parse_args():
+    arg_parser = argparse.ArgumentParser(description="Benchmark the compiler on synthetic C-minus programs.")
+    arg_parser.add_argument("shapes", nargs="*", default=list(SHAPES), help=f"shapes to run ({', '.join(SHAPES)})")
+    arg_parser.add_argument("--scale", type=float, default=1.0, help="multiply the number of generated functions")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="runs per measurement, the fastest is kept")
+    arg_parser.add_argument("--json", metavar="FILE", help="write the results to FILE")
+    arg_parser.add_argument("--baseline", metavar="FILE", help="compare against results written by --json")
+    arg_parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="allowed throughput drop against the baseline (default 0.2)"
+    )
+    return arg_parser.parse_args()
+
+
+def best_time(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, value
+
+
+def scan(input_file):
+    return sum(1 for _ in Scanner(input_file, chunk_size=CHUNK_SIZE).iter_tokens())
+
+
+def parse(input_file, parse_table, generate_code):
+    parser = Parser(Scanner(input_file, chunk_size=CHUNK_SIZE), None, parse_table, build_tree=False)
+    if not generate_code:
+        parser.routines = [(lambda: None, False)] * len(parser.routines)
+    parser.parse()
+    return len(parser.code_generator.program_block)
+
+
+def measure(shape, scale, repeat, parse_table):
+    with tempfile.TemporaryDirectory() as directory:
+        input_file = os.path.join(directory, "input.txt")
+        with open(input_file, "w") as f:
+            f.write(generate_program(shape, scale))
+        size = os.path.getsize(input_file)
+        scan_time, tokens = best_time(lambda: scan(input_file), repeat)
+        parse_time, _ = best_time(lambda: parse(input_file, parse_table, False), repeat)
+        compile_time, instructions = best_time(lambda: parse(input_file, parse_table, True), repeat)
+        end_to_end_time, _ = best_time(lambda: compile_program(input_file, parse_table), repeat)
+    codegen_time = max(compile_time - parse_time, 1e-9)
+    return {
+        "shape": shape,
+        "bytes": size,
+        "tokens": tokens,
+        "instructions": instructions,
+        "scan_s": scan_time,
+        "parse_s": parse_time,
+        "compile_s": compile_time,
+        "end_to_end_s": end_to_end_time,
+        "scan_tokens_per_s": tokens / scan_time,
+        "parse_tokens_per_s": tokens / max(parse_time - scan_time, 1e-9),
+        "codegen_instructions_per_s": instructions / codegen_time,
+        "end_to_end_bytes_per_s": size / end_to_end_time,
+        "peak_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource is not None else None,
+    }
+
+
+def measure_in_child(connection, shape, scale, repeat, parse_table):
+    connection.send(measure(shape, scale, repeat, parse_table))
+    connection.close()
+
+
+def run_isolated(shape, scale, repeat, parse_table):
+    context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+    if context is None:
+        return measure(shape, scale, repeat, parse_table)
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=measure_in_child, args=(sender, shape, scale, repeat, parse_table))
+    process.start()
+    result = receiver.recv()
+    process.join()
+    return result
+
+
+def print_results(results):
+    print(
+        f"{'shape':<12}{'KiB':>8}{'tokens':>9}{'instrs':>9}{'scan tok/s':>12}{'parse tok/s':>13}"
+        f"{'codegen ins/s':>15}{'e2e KiB/s':>11}{'peak RSS MiB':>14}"
+    )
+    for result in results:
+        rss = result["peak_rss_kib"]
+        print(
+            f"{result['shape']:<12}{result['bytes'] / 1024:>8.0f}{result['tokens']:>9}{result['instructions']:>9}"
+            f"{result['scan_tokens_per_s']:>12.0f}{result['parse_tokens_per_s']:>13.0f}"
+            f"{result['codegen_instructions_per_s']:>15.0f}{result['end_to_end_bytes_per_s'] / 1024:>11.0f}"
+            f"{rss / 1024 if rss is not None else float('nan'):>14.1f}"
+        )
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    previous = {result["shape"]: result for result in baseline}
+    for result in results:
+        if result["shape"] not in previous:
+            continue
+        for metric in METRICS:
+            before, after = previous[result["shape"]][metric], result[metric]
+            if after < before * (1 - tolerance):
+                regressions.append(f"{result['shape']}: {metric} dropped from {before:.0f} to {after:.0f}")
+    return regressions
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    parse_table = load_parse_table()
+    results = [run_isolated(shape, args.scale, args.repeat, parse_table) for shape in args.shapes]
+    print_results(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=4)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"regression: {regression}")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,59 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COLD_PATH_EXCLUDES = [
+    "anytree", "json", "pickle", "typing", "multiprocessing", "grammar", "optimizer", "bytecode", "incremental",
+]
+PROGRAM = "void main(void) {\n    int a;\n    a = 2;\n    output(a * 3);\n}\n"
+
+
+def parse_args():
+    arg_parser = argparse.ArgumentParser(description="Check the import time of compiler.py against a budget.")
+    arg_parser.add_argument("--repeat", type=int, default=10, help="runs per measurement, the fastest is kept")
+    arg_parser.add_argument(
+        "--budget-ms", type=float, default=50.0, help="allowed cumulative import time of compiler (default 50)"
+    )
+    return arg_parser.parse_args()
+
+
+def import_times():
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import compiler"],
+        cwd=ROOT, stderr=subprocess.PIPE, universal_newlines=True, check=True,
+    )
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def cold_compile_time(directory):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(ROOT, "compiler.py")], cwd=directory, check=True)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    runs = [import_times() for _ in range(args.repeat)]
+    import_ms = min(run["compiler"] for run in runs) / 1000
+    loaded = sorted(name for name in COLD_PATH_EXCLUDES if any(name in run for run in runs))
+    with tempfile.TemporaryDirectory() as directory:
+        os.symlink(os.path.join(ROOT, "assets"), os.path.join(directory, "assets"))
+        with open(os.path.join(directory, "input.txt"), "w") as f:
+            f.write(PROGRAM)
+        compile_ms = min(cold_compile_time(directory) for _ in range(args.repeat)) * 1000
+    print(f"import compiler: {import_ms:.1f} ms (budget {args.budget_ms:.1f} ms)")
+    print(f"one-shot compile of a small program: {compile_ms:.1f} ms")
+    for name in loaded:
+        print(f"imported on the cold path: {name}")
+    sys.exit(1 if import_ms > args.budget_ms or loaded else 0)
@@ -0,0 +1,95 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from scanner import Scanner, CHUNK_SIZE
+from parser_module import Parser, load_parse_table
+from generator import generate_program
+
+
+class TypeMap(dict):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+        self.seconds = 0.0
+
+    def get(self, address, default=None):
+        start = time.perf_counter()
+        operand_type = super().get(address, default)
+        self.seconds += time.perf_counter() - start
+        self.calls += 1
+        return operand_type
+
+
+class ScannedTypes:
+    def __init__(self, symbol_table):
+        self.symbol_table = symbol_table
+        self.calls = 0
+        self.seconds = 0.0
+
+    def __setitem__(self, address, var_type):
+        pass
+
+    def pop(self, address, default=None):
+        return default
+
+    def get(self, address, default=None):
+        start = time.perf_counter()
+        operand_type = default
+        for entry in self.symbol_table:
+            if entry.address == address:
+                operand_type = entry.type
+                break
+        self.seconds += time.perf_counter() - start
+        self.calls += 1
+        return operand_type
+
+
+def parse_args():
+    arg_parser = argparse.ArgumentParser(
+        description="Compare the logger's address->type map against scanning the symbol table per operand."
+    )
+    arg_parser.add_argument("--shape", default="expressions", help="generator shape (default expressions)")
+    arg_parser.add_argument(
+        "--scale", type=float, default=5.0, help="multiply the number of generated functions (default 5)"
+    )
+    arg_parser.add_argument("--repeat", type=int, default=3, help="runs per measurement, the fastest is kept")
+    return arg_parser.parse_args()
+
+
+def measure(input_file, parse_table, scanned):
+    parser = Parser(Scanner(input_file, chunk_size=CHUNK_SIZE), None, parse_table, build_tree=False)
+    error_logger = parser.code_generator.error_logger
+    types = error_logger.operand_types = ScannedTypes(error_logger.symbol_table) if scanned else TypeMap()
+    start = time.perf_counter()
+    parser.parse()
+    return time.perf_counter() - start, types.calls, types.seconds, error_logger.errors
+
+
+def best_runs(input_file, parse_table, repeat):
+    runs = [[], []]
+    for _ in range(repeat):
+        for scanned in (False, True):
+            runs[scanned].append(measure(input_file, parse_table, scanned))
+    return [min(variant, key=lambda run: run[2]) for variant in runs]
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    parse_table = load_parse_table()
+    input_file = os.path.join(tempfile.gettempdir(), "type_checks_input.txt")
+    with open(input_file, "w") as f:
+        f.write(generate_program(args.shape, args.scale))
+    cached, scanned = best_runs(input_file, parse_table, args.repeat)
+    if cached[3] != scanned[3]:
+        sys.exit("type map and symbol table scan report different semantic errors")
+    print(f"{'lookup':<10}{'lookups':>9}{'lookup ms':>11}{'us/lookup':>11}{'compile s':>11}")
+    for name, (elapsed, calls, seconds, _) in (("map", cached), ("scan", scanned)):
+        print(f"{name:<10}{calls:>9}{seconds * 1000:>11.1f}{seconds / max(calls, 1) * 1e6:>11.2f}{elapsed:>11.2f}")
+    print(f"operand type lookups {scanned[2] / cached[2]:.1f}x faster with the address->type map")
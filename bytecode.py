@@ -0,0 +1,102 @@
+from utils import *
+from pb import ProgramBlock, OPERATION_CODES
+import struct
+import sys
+
+MAGIC = b"CMBC"
+VERSION = 1
+HEADER = struct.Struct("<4sHHI")
+RECORD = struct.Struct("<BBxxiii")
+
+MODE_NONE = 0
+MODE_IMMEDIATE = 1
+MODE_DIRECT = 2
+MODE_INDIRECT = 3
+
+MODE_PREFIXES = {MODE_IMMEDIATE: "#", MODE_DIRECT: "", MODE_INDIRECT: "@"}
+
+INT32_MIN = -(1 << 31)
+INT32_MAX = (1 << 31) - 1
+
+
+def encode_operand(operand):
+    if operand == "":
+        return MODE_NONE, 0
+    try:
+        if operand[0] == "#":
+            mode, value = MODE_IMMEDIATE, int(operand[1:])
+        elif operand[0] == "@":
+            mode, value = MODE_INDIRECT, int(operand[1:])
+        else:
+            mode, value = MODE_DIRECT, int(operand)
+    except ValueError:
+        raise ValueError(f"cannot encode operand {operand!r}") from None
+    if not INT32_MIN <= value <= INT32_MAX:
+        raise ValueError(f"cannot encode operand {operand!r}: value does not fit in 32 bits")
+    return mode, value
+
+
+def decode_operand(mode, value):
+    if mode == MODE_NONE:
+        return ""
+    if mode not in MODE_PREFIXES:
+        raise ValueError(f"invalid addressing mode {mode}")
+    return f"{MODE_PREFIXES[mode]}{value}"
+
+
+def encode_program(program_block):
+    operands = [encode_operand(operand) for operand in program_block.operands]
+    records = [HEADER.pack(MAGIC, VERSION, 0, len(program_block))]
+    for operation, arg1, arg2, result in zip(
+            program_block.operations, program_block.args1, program_block.args2, program_block.results
+    ):
+        (mode1, value1), (mode2, value2), (mode3, value3) = operands[arg1], operands[arg2], operands[result]
+        records.append(RECORD.pack(operation, mode1 | mode2 << 2 | mode3 << 4, value1, value2, value3))
+    return b"".join(records)
+
+
+def read_header(data):
+    if len(data) < HEADER.size:
+        raise ValueError("truncated bytecode header")
+    magic, version, flags, count = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a bytecode file")
+    if version != VERSION:
+        raise ValueError(f"unsupported bytecode version {version}")
+    if len(data) != HEADER.size + count * RECORD.size:
+        raise ValueError("truncated bytecode records")
+    return count
+
+
+def iter_records(data):
+    read_header(data)
+    for operation, modes, value1, value2, value3 in RECORD.iter_unpack(memoryview(data)[HEADER.size:]):
+        if operation >= len(OPERATION_CODES):
+            raise ValueError(f"invalid operation code {operation}")
+        yield operation, modes & 3, value1, modes >> 2 & 3, value2, modes >> 4 & 3, value3
+
+
+def decode_program(data):
+    program_block = ProgramBlock()
+    for operation, mode1, value1, mode2, value2, mode3, value3 in iter_records(data):
+        program_block.emit(
+            OPERATION_CODES[operation],
+            decode_operand(mode1, value1),
+            decode_operand(mode2, value2),
+            decode_operand(mode3, value3),
+        )
+    return program_block
+
+
+def write_program(program_block, output_file):
+    with open(output_file, "wb") as f:
+        f.write(encode_program(program_block))
+
+
+def read_program(input_file):
+    with open(input_file, "rb") as f:
+        return decode_program(f.read())
+
+
+if __name__ == "__main__":
+    sys.stdout.write(read_program(sys.argv[1]).format())
@@ -1,6 +1,6 @@
 from utils import *
-from pb import Instruction, ProgramBlock
-from semantic_stack import SemanticStack, ReturnStack
+from pb import ProgramBlock
+from semantic_stack import SemanticStack, BackpatchStack
 from semantic_error_logger import SemanticErrorLogger
 from scanner import SymbolTableEntry, FunctionRecordEntry
 
@@ -10,41 +10,42 @@ class CodeGenerator:
         self.semantic_stack = SemanticStack()
         self.program_block = ProgramBlock()
         self.scanner = scanner
+        self.symbol_table = scanner.SYMBOL_TABLE["id"]
         self.error_logger = SemanticErrorLogger(self.scanner)
-        self.break_stack = []
-        self.return_stack = ReturnStack()
+        self.break_frames = BackpatchStack()
+        self.return_frames = BackpatchStack()
         self.index = 0
         self.current_scope = 0
         self.temp_address = 10000
         self.token = None
         self.scope_trash = []
 
-    def call_routine(self, name, token):
-        name = name.replace("#", "")
+    def get_routine(self, name):
         routine = self.__getattribute__(name)
-        if routine.__code__.co_argcount == 2:
+        return routine, routine.__code__.co_argcount == 2
+
+    def call_routine(self, name, token):
+        routine, takes_token = self.get_routine(name.replace("#", ""))
+        if takes_token:
             routine(token)
         else:
             routine()
 
     def insert_instruction(self, opcode, operand1, operand2="", operand3=""):
-        instruction = Instruction(opcode, operand1, operand2, operand3)
-        self.program_block.append(instruction)
+        self.program_block.emit(opcode, operand1, operand2, operand3)
         self.index += 1
 
     def add_index(self, num=1):
-        for _ in range(num):
-            self.program_block.append(Instruction.empty())
+        self.program_block.add_empty(num)
         self.index += num
 
     def find_address(self, item):
         if item == "output":
             return item
-        for record in self.scanner.SYMBOL_TABLE["id"][::-1]:
-            if record.id == item and record.scope <= self.current_scope:
-                if isinstance(record, FunctionRecordEntry):
-                    return record
-                return record.address
+        record = self.symbol_table.lookup(item, self.current_scope)
+        if record is None or isinstance(record, FunctionRecordEntry):
+            return record
+        return record.address
 
     def get_temp(self, count=1):
         for _ in range(count):
@@ -52,13 +53,19 @@ class CodeGenerator:
             self.temp_address += 4
         return str(self.temp_address - 4 * count)
 
+    def get_expression_temp(self):
+        address = self.get_temp()
+        self.program_block.temporaries.add(address)
+        return address
+
     def def_var(self):
         var_id = self.semantic_stack.pop()
         self.error_logger.void_check(self.token, var_id)
         address = self.get_temp()
-        self.scanner.SYMBOL_TABLE["id"].append(
+        self.symbol_table.append(
             SymbolTableEntry(var_id, "int", address, self.current_scope)
         )
+        self.error_logger.define_type(address, "int")
 
     def def_arr(self):
         arr_size, arr_id = self.semantic_stack.pop(), self.semantic_stack.pop()
@@ -67,9 +74,10 @@ class CodeGenerator:
         address = self.get_temp()
         array_space = self.get_temp(arr_size)
         self.insert_instruction(Operation.Assign, f"#{array_space}", address)
-        self.scanner.SYMBOL_TABLE["id"].append(
+        self.symbol_table.append(
             SymbolTableEntry(arr_id, "int*", address, self.current_scope)
         )
+        self.error_logger.define_type(address, "int*")
 
     def get_id(self, token):
         self.token = token
@@ -94,7 +102,7 @@ class CodeGenerator:
             self.semantic_stack.pop(),
         )
         self.error_logger.type_mismatch(token, operand1, operand2)
-        address = self.get_temp()
+        address = self.get_expression_temp()
         self.insert_instruction(
             Operation.get_operation(operator), operand1, operand2, address
         )
@@ -107,21 +115,22 @@ class CodeGenerator:
         self.semantic_stack.pop()
 
     def mult(self, token):
-        result = self.get_temp()
+        result = self.get_expression_temp()
         operand1, operand2 = self.semantic_stack.pop(), self.semantic_stack.pop()
         self.error_logger.type_mismatch(token, operand1, operand2, mult=True)
         self.insert_instruction(Operation.Mult, operand1, operand2, result)
         self.semantic_stack.push(result)
 
     def def_arr_arg(self):
-        temp = self.scanner.SYMBOL_TABLE["id"].pop()
-        self.scanner.SYMBOL_TABLE["id"].append(
+        temp = self.symbol_table.pop()
+        self.symbol_table.append(
             SymbolTableEntry(temp.id, "int*", temp.address, temp.scope)
         )
+        self.error_logger.define_type(temp.address, "int*")
 
     def arr_idx(self):
         idx, arr_addr = self.semantic_stack.pop(), self.semantic_stack.pop()
-        temp, result = self.get_temp(), self.get_temp()
+        temp, result = self.get_expression_temp(), self.get_expression_temp()
 
         self.insert_instruction(Operation.Mult, "#4", idx, temp)
         self.insert_instruction(Operation.Assign, arr_addr, result)
@@ -138,30 +147,26 @@ class CodeGenerator:
 
     def jmp(self):
         dest = self.semantic_stack.pop()
-        self.program_block[int(dest)] = Instruction(Operation.Jp, self.index, "", "")
+        self.program_block.set(int(dest), Operation.Jp, self.index)
 
     def clean_up(self):
         self.semantic_stack.pop()
 
     def new_break(self):
-        self.break_stack.append(BREAK)
+        self.break_frames.push_frame()
 
     def until(self):
         operand1, operand2 = self.semantic_stack.pop(), self.semantic_stack.pop()
         self.insert_instruction(Operation.Jpf, operand1, operand2)
 
     def end_break(self):
-        last_block = last_index_of(self.break_stack, BREAK)
-        for record in self.break_stack[last_block + 1:]:
-            self.program_block[record] = Instruction(Operation.Jp, str(self.index), "", "")
-        self.break_stack = self.break_stack[:last_block]
+        for index in self.break_frames.pop_frame().entries:
+            self.program_block.set(index, Operation.Jp, self.index)
 
     def jpf_save(self):
         dest = self.semantic_stack.pop()
         src = self.semantic_stack.pop()
-        self.program_block[dest] = Instruction(
-            Operation.Jpf, src, self.index + 1, ""
-        )
+        self.program_block.set(dest, Operation.Jpf, src, self.index + 1)
         self.semantic_stack.push(self.index)
         self.add_index()
 
@@ -170,24 +175,17 @@ class CodeGenerator:
             self.insert_instruction(Operation.Print, self.semantic_stack.pop())
 
     def break_loop(self, token):
-        self.break_stack.append(self.index)
+        if not self.break_frames.empty():
+            self.break_frames.add(self.index)
         self.add_index()
-        self.error_logger.break_check(self.break_stack, token)
+        self.error_logger.break_check(self.break_frames, token)
 
     def start_params(self):
         func_attr = self.semantic_stack.pop()
         self.semantic_stack.push(self.index)
         self.add_index()
         self.semantic_stack.push(func_attr)
-        self.scanner.SYMBOL_TABLE["id"].append(
-            SymbolTableEntry("Args ->", "", "", self.current_scope)
-        )
-
-    def find_args_start(self):
-        for i, entry in enumerate(self.scanner.SYMBOL_TABLE["id"]):
-            if entry.id == "Args ->":
-                return i
-        return -1
+        self.symbol_table.start_args()
 
     def create_record(self):
         return_address = self.get_temp()
@@ -195,42 +193,34 @@ class CodeGenerator:
         self.semantic_stack.push(return_value)
         self.semantic_stack.push(return_address)
         func_id = self.semantic_stack.top(2)
-        args_start = self.find_args_start()
         function_record = FunctionRecordEntry(
             return_address,
             return_value,
             func_id,
             self.index - 1,
-            self.scanner.SYMBOL_TABLE["id"],
-            args_start,
+            self.symbol_table.end_args(),
             self.current_scope,
         )
-        self.scanner.SYMBOL_TABLE["id"].pop(args_start)
-        self.scanner.SYMBOL_TABLE["id"].append(function_record)
+        self.symbol_table.append(function_record)
 
-        self.return_stack.push_return(func_id)
+        self.return_frames.push_frame(func_id)
 
     def end_func(self):
-
-        last_func, last_func_idx = self.return_stack.last_return()
         return_address, return_value = self.semantic_stack.pop(), self.semantic_stack.pop()
-        for entry in self.return_stack[last_func_idx + 1:]:
-            self.program_block[entry.index] = Instruction(Operation.Assign, str(entry.value), str(return_value), "")
-            self.program_block[entry.index + 1] = Instruction(Operation.Jp, f"@{return_address}", "", "")
-        self.return_stack.remove_last_func()
+        for index, value in self.return_frames.pop_frame().entries:
+            self.program_block.set(index, Operation.Assign, value, return_value)
+            self.program_block.set(index + 1, Operation.Jp, f"@{return_address}")
 
         if self.semantic_stack.pop() != "main":
             return_address = self.semantic_stack.top()
             self.insert_instruction(Operation.Jp, f"@{return_address}")
 
         dest = self.semantic_stack.pop()
-        for record in self.scanner.SYMBOL_TABLE["id"][::-1]:
-            if isinstance(record, FunctionRecordEntry):
-                if record.id == "main":
-                    self.program_block[dest] = Instruction(Operation.Assign, "#0", self.get_temp(), "")
-                    return
-                break
-        self.program_block[dest] = Instruction(Operation.Jp, str(self.index), "", "")
+        last_func = self.symbol_table.last_function()
+        if last_func is not None and last_func.id == "main":
+            self.program_block.set(dest, Operation.Assign, "#0", self.get_temp())
+            return
+        self.program_block.set(dest, Operation.Jp, self.index)
 
     def func_call(self, token):
         if self.semantic_stack.top() == "output":
@@ -254,19 +244,20 @@ class CodeGenerator:
             Operation.Assign, f"#{self.index + 2}", function_record.return_address
         )
         self.insert_instruction(Operation.Jp, function_record.index + 1)
-        result = self.get_temp()
+        result = self.get_expression_temp()
         self.insert_instruction(Operation.Assign, function_record.return_value, result)
         self.semantic_stack.push(result)
 
     def return_func(self):
-        self.return_stack.push("", self.index, self.semantic_stack.pop())
+        self.return_frames.add((self.index, self.semantic_stack.pop()))
         self.add_index(2)
 
     def save_return(self, token):
-        last_return = self.return_stack.top()
-        if last_return.func_id == "main" or last_return.index + 2 == self.index:
+        frame = self.return_frames.top()
+        last_index = frame.entries[-1][0] if frame.entries else -1
+        if not frame.entries and frame.owner == "main" or last_index + 2 == self.index:
             return
-        self.return_stack.push("", self.index, f"#{self.index}")
+        self.return_frames.add((self.index, f"#{self.index}"))
         self.add_index(2)
 
     def push_scope(self):
@@ -276,14 +267,7 @@ class CodeGenerator:
         self.current_scope -= 1
 
     def pop_scope(self):
-        symbol_table = self.scanner.SYMBOL_TABLE["id"].copy()
-        left_overs = []
-        for record in symbol_table[::-1]:
-            deleted = self.scanner.SYMBOL_TABLE["id"].pop()
-            if record.scope != self.current_scope:
-                left_overs.append(deleted)
-                continue
-        self.scanner.SYMBOL_TABLE["id"].extend(left_overs[::-1])
+        self.error_logger.forget_types(self.symbol_table.pop_scope(self.current_scope))
         self.current_scope -= 1
 
     def push_idx(self):
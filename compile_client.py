@@ -0,0 +1,43 @@
+from utils import write_outputs
+import base64
+import json
+import os
+import socket
+import sys
+
+SOCKET_PATH = os.environ.get("COMPILER_SOCKET", "/tmp/c-minus-compiler.sock")
+COMPILER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "compiler.py")
+
+
+def send_request(request, socket_path=SOCKET_PATH):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path)
+        connection.sendall(json.dumps(request).encode() + b"\n")
+        chunks = []
+        while not chunks or not chunks[-1].endswith(b"\n"):
+            chunk = connection.recv(1 << 16)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return json.loads(b"".join(chunks))
+
+
+def run_locally():
+    os.execv(sys.executable, [sys.executable, COMPILER] + sys.argv[1:])
+
+
+if __name__ == "__main__":
+    try:
+        server_response = send_request({"argv": sys.argv[1:], "cwd": os.getcwd()})
+    except (OSError, ValueError):
+        server_response = {"fallback": True}
+    if server_response.get("fallback"):
+        run_locally()
+    if "error" in server_response:
+        sys.stderr.write(f"compile server: {server_response['error']}\n")
+        sys.exit(1)
+    encoded = server_response["bytecode"]
+    write_outputs(
+        server_response["output_dir"], server_response["semantic_errors"], server_response["output"],
+        base64.b64decode(encoded) if encoded is not None else None, server_response["profile"],
+    )
@@ -0,0 +1,121 @@
+from compiler import parse_args, get_paths, get_cache_file, compile_program, init_worker
+from parser_module import load_parse_table
+# compiler.py imports these on first use; load them before the workers fork.
+import bytecode
+import incremental
+import optimizer
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stderr, redirect_stdout
+import compiler
+import argparse
+import asyncio
+import base64
+import io
+import json
+import os
+import signal
+import socket
+
+SOCKET_PATH = os.environ.get("COMPILER_SOCKET", "/tmp/c-minus-compiler.sock")
+
+
+def parse_server_args():
+    arg_parser = argparse.ArgumentParser(
+        description="Keep the compiler warm and serve compile_client.py requests over a Unix socket."
+    )
+    arg_parser.add_argument("--socket", default=SOCKET_PATH, help=f"socket path (default {SOCKET_PATH})")
+    arg_parser.add_argument("-j", "--jobs", type=int, default=0, help="worker processes (0 uses every CPU)")
+    return arg_parser.parse_args()
+
+
+def get_job(request):
+    with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+        args = parse_args(request["argv"])
+    if args.batch:
+        return None
+    input_file, output_dir = get_paths(args)
+    cache_file = get_cache_file(os.path.join(request["cwd"], output_dir)) if args.incremental else None
+    job = (os.path.join(request["cwd"], input_file), args.optimize, args.bytecode, args.profile, cache_file, args.mmap)
+    return job, output_dir
+
+
+def compile_job(job):
+    input_file, optimize_code, write_bytecode, profile, cache_file, use_mmap = job
+    result = compile_program(
+        input_file, compiler.worker_parse_table, optimize_code, write_bytecode, profile, cache_file=cache_file,
+        use_mmap=use_mmap,
+    )
+    return {
+        "semantic_errors": result.semantic_errors,
+        "output": result.output,
+        "bytecode": base64.b64encode(result.bytecode).decode() if result.bytecode is not None else None,
+        "profile": result.profile,
+    }
+
+
+def remove_stale_socket(socket_path):
+    if not os.path.exists(socket_path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        try:
+            connection.connect(socket_path)
+        except OSError:
+            os.remove(socket_path)
+            return
+    raise ValueError(f"a compile server is already listening on {socket_path}")
+
+
+class CompileServer:
+    def __init__(self, socket_path=SOCKET_PATH, jobs=0):
+        self.socket_path = socket_path
+        self.executor = ProcessPoolExecutor(
+            jobs or os.cpu_count(), initializer=init_worker, initargs=(load_parse_table(),)
+        )
+
+    async def respond(self, line):
+        try:
+            request = json.loads(line)
+            job = get_job(request)
+        except SystemExit:
+            return {"fallback": True}
+        except (ValueError, KeyError, TypeError) as error:
+            return {"error": f"invalid request: {error}"}
+        if job is None:
+            return {"fallback": True}
+        job, output_dir = job
+        try:
+            response = await asyncio.get_running_loop().run_in_executor(self.executor, compile_job, job)
+        except Exception as error:
+            return {"error": f"{type(error).__name__}: {error}"}
+        response["output_dir"] = output_dir
+        return response
+
+    async def handle(self, reader, writer):
+        try:
+            response = await self.respond(await reader.readline())
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self):
+        remove_stale_socket(self.socket_path)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, int)
+        server = await asyncio.start_unix_server(self.handle, path=self.socket_path)
+        stop = loop.create_future()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, lambda: stop.done() or stop.set_result(None))
+        try:
+            async with server:
+                await stop
+        finally:
+            os.remove(self.socket_path)
+            self.executor.shutdown()
+
+
+if __name__ == "__main__":
+    server_args = parse_server_args()
+    asyncio.run(CompileServer(server_args.socket, server_args.jobs).serve())
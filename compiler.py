@@ -1,44 +1,229 @@
 from utils import *
-from scanner import Scanner
-from parser_module import Parser
-import pickle
+from scanner import Scanner, CHUNK_SIZE
+from parser_module import Parser, load_parse_table
+from profiler import Profiler, measure
+import argparse
+import os
 import sys
 
+
+def parse_args(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Compile a C-minus program to three-address code.")
+    arg_parser.add_argument("input_dir", nargs="?", help="directory containing input.txt")
+    arg_parser.add_argument("output_name", nargs="?", help="name of the directory under output/")
+    arg_parser.add_argument("-O", "--optimize", action="store_true", help="optimize the generated code")
+    arg_parser.add_argument(
+        "--bytecode", action="store_true", help="also write the binary encoding of the program to output.bin"
+    )
+    arg_parser.add_argument(
+        "--profile", action="store_true", help="write per-phase timings and call counts to profile.json"
+    )
+    arg_parser.add_argument(
+        "--incremental", action="store_true",
+        help="reuse the code of unchanged top-level declarations, cached in the output directory"
+    )
+    arg_parser.add_argument(
+        "--mmap", action="store_true", help="read input.txt through a memory map instead of in chunks"
+    )
+    arg_parser.add_argument(
+        "--batch", nargs="+", metavar="DIR",
+        help="compile DIR/input.txt for every DIR into output/<basename of DIR>/"
+    )
+    arg_parser.add_argument(
+        "-j", "--jobs", type=int, default=1,
+        help="number of worker processes for --batch (0 uses every CPU)"
+    )
+    return arg_parser.parse_args(argv)
+
+
+def get_paths(args):
+    if args.input_dir is None:
+        return "input.txt", ""
+    return args.input_dir + "/input.txt", "output/" + args.output_name + "/"
+
+
+def compile_program(input_file, parse_table, optimize_code=False, bytecode=False, profile=False, input_dir=None,
+                    cache_file=None, use_mmap=False):
+    profiler = Profiler() if profile else None
+    with measure(profiler, "parse"):
+        parser = parse_program(input_file, parse_table, profiler, cache_file, use_mmap)
+    with measure(profiler, "optimize"):
+        program_block = get_program_block(parser, optimize_code)
+    with measure(profiler, "format"):
+        output = get_output_text(program_block)
+        encoded = get_bytecode(program_block, bytecode)
+    return CompileResult(
+        input_dir,
+        get_semantic_errors_text(parser),
+        output,
+        encoded,
+        sum(len(errors) for errors in parser.scanner.LEXICAL_ERRORS.values()),
+        len(parser.code_generator.error_logger.errors),
+        profile=profiler.report(input_file) if profiler is not None else None,
+    )
+
+
+def parse_program(input_file, parse_table, profiler=None, cache_file=None, use_mmap=False):
+    if cache_file is not None:
+        from incremental import parse_incrementally
+
+        parser = parse_incrementally(input_file, parse_table, cache_file, profiler, use_mmap)
+        if parser is not None:
+            return parser
+    scanner = Scanner(input_file, chunk_size=CHUNK_SIZE, use_mmap=use_mmap)
+    parser = Parser(scanner, parse_table.rule_dict, parse_table, build_tree=False)
+    if profiler is not None:
+        profiler.instrument_parser(parser)
+    try:
+        parser.parse()
+    finally:
+        scanner.close()
+    return parser
+
+
+class CompileResult:
+    def __init__(self, input_dir, semantic_errors="", output="", bytecode=None, lexical_error_count=0,
+                 semantic_error_count=0, failure=None, profile=None):
+        self.input_dir = input_dir
+        self.semantic_errors = semantic_errors
+        self.output = output
+        self.bytecode = bytecode
+        self.lexical_error_count = lexical_error_count
+        self.semantic_error_count = semantic_error_count
+        self.failure = failure
+        self.profile = profile
+
+    def __str__(self):
+        if self.failure is not None:
+            return f"{self.input_dir}: failed ({self.failure})"
+        return (
+            f"{self.input_dir}: {self.lexical_error_count} lexical errors, "
+            f"{self.semantic_error_count} semantic errors"
+        )
+
+
+def get_semantic_errors_text(parser):
+    if parser.code_generator.error_logger.empty():
+        return "The input program is semantically correct."
+    return "".join(f"{error}\n" for error in parser.code_generator.error_logger)
+
+
+def get_program_block(parser, optimize_code=False):
+    if not parser.code_generator.error_logger.empty():
+        return None
+    program_block = parser.code_generator.program_block
+    if optimize_code:
+        from optimizer import optimize
+
+        program_block = optimize(program_block)
+    return program_block
+
+
+def get_output_text(program_block):
+    if program_block is None:
+        return "The output code has not been generated."
+    return program_block.format()
+
+
+def get_bytecode(program_block, bytecode=False):
+    if not bytecode or program_block is None:
+        return None
+    from bytecode import encode_program
+
+    return encode_program(program_block)
+
+
+def get_output_dir(input_dir):
+    return "output/" + os.path.basename(os.path.normpath(input_dir)) + "/"
+
+
+def get_cache_file(output_dir):
+    from incremental import INCREMENTAL_CACHE
+
+    return output_dir + INCREMENTAL_CACHE
+
+
+def compile_directory(input_dir, parse_table, optimize_code=False, bytecode=False, profile=False, incremental=False,
+                      use_mmap=False):
+    cache_file = get_cache_file(get_output_dir(input_dir)) if incremental else None
+    try:
+        return compile_program(
+            os.path.join(input_dir, "input.txt"), parse_table, optimize_code, bytecode, profile, input_dir, cache_file,
+            use_mmap,
+        )
+    except Exception as error:
+        return CompileResult(input_dir, failure=error)
+
+
+worker_parse_table = None
+
+
+def init_worker(parse_table):
+    global worker_parse_table
+    worker_parse_table = parse_table
+
+
+def compile_in_worker(job):
+    return compile_directory(job[0], worker_parse_table, *job[1:])
+
+
+def compile_batch(input_dirs, optimize_code=False, jobs=1, bytecode=False, profile=False, incremental=False,
+                  use_mmap=False):
+    parse_table = load_parse_table()
+    if jobs == 1 or len(input_dirs) < 2:
+        results = (
+            compile_directory(input_dir, parse_table, optimize_code, bytecode, profile, incremental, use_mmap)
+            for input_dir in input_dirs
+        )
+        return [write_result(result) for result in results]
+    jobs = min(jobs or os.cpu_count(), len(input_dirs))
+    chunk_size = max(1, len(input_dirs) // (jobs * 4))
+    import multiprocessing
+
+    with multiprocessing.Pool(jobs, initializer=init_worker, initargs=(parse_table,)) as pool:
+        results = pool.imap(
+            compile_in_worker,
+            [(input_dir, optimize_code, bytecode, profile, incremental, use_mmap) for input_dir in input_dirs],
+            chunk_size,
+        )
+        return [write_result(result) for result in results]
+
+
+def write_result(result):
+    output_dir = get_output_dir(result.input_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    if result.failure is None:
+        write_outputs(output_dir, result.semantic_errors, result.output, result.bytecode, result.profile)
+    return result
+
+
+def print_summary(results, output=sys.stdout):
+    for result in results:
+        output.write(f"{result}\n")
+    failed = sum(result.failure is not None for result in results)
+    lexical = sum(result.lexical_error_count for result in results)
+    semantic = sum(result.semantic_error_count for result in results)
+    output.write(
+        f"{len(results)} programs, {failed} failed, {lexical} lexical errors, {semantic} semantic errors\n"
+    )
+
+
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        input_dir = ""
-        output_dir = ""
-    else:
-        input_dir = sys.argv[1] + "/"
-        output_dir = "output/" + sys.argv[2] + "/"
-    scanner = Scanner(input_dir + "input.txt")
-    rule_dict = pickle.load(open("assets/grammar_with_actions.pkl", "rb"))
-    parser = Parser(scanner, rule_dict)
-    parser.parse()
-
-    with open(output_dir + "semantic_errors.txt", "w") as output:
-        if not parser.code_generator.error_logger.empty():
-            for error in parser.code_generator.error_logger:
-                output.write(f"{error}\n")
-        else:
-            output.write("The input program is semantically correct.")
-
-    with open(output_dir + "output.txt", "w") as output:
-        if not parser.code_generator.error_logger.empty():
-            output.write("The output code has not been generated.")
-        else:
-            program_block = parser.code_generator.program_block.instructions
-            for i, instruction in enumerate(program_block):
-                output.write(
-                    f"{i}\t{instruction}\n")
-
-    # with open("parse_tree.txt", "w") as output:
-    #     for pre, fill, node in RenderTree(parser.root):
-    #         output.write("%s%s\n" % (pre, node.name))
-    #
-    # with open("syntax_errors.txt", "w") as output:
-    #     if parser.syntax_error:
-    #         for error in parser.syntax_error:
-    #             output.write(f"{error}\n")
-    #     else:
-    #         output.write("There is no syntax error.")
+    args = parse_args()
+    if args.batch:
+        batch_results = compile_batch(
+            args.batch, args.optimize, args.jobs, args.bytecode, args.profile, args.incremental, args.mmap
+        )
+        print_summary(batch_results)
+        sys.exit(1 if any(result.failure is not None for result in batch_results) else 0)
+    input_file, output_dir = get_paths(args)
+    parse_table = load_parse_table()
+    cache_file = get_cache_file(output_dir) if args.incremental else None
+    try:
+        result = compile_program(
+            input_file, parse_table, args.optimize, args.bytecode, args.profile, cache_file=cache_file,
+            use_mmap=args.mmap,
+        )
+    except ValueError as error:
+        sys.exit(f"{input_file}: {error}")
+    write_outputs(output_dir, result.semantic_errors, result.output, result.bytecode, result.profile)
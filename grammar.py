@@ -0,0 +1,139 @@
+from utils import *
+import json
+import sys
+
+END_MARKER = "$"
+
+
+def is_action(symbol):
+    return symbol.startswith("#")
+
+
+class Grammar:
+    def __init__(self, rule_dict, start=None):
+        self.rules = rule_dict
+        self.start = start if start is not None else next(iter(rule_dict))
+        self.non_terminals = list(rule_dict)
+        self.terminals = []
+        seen = set()
+        for alternatives in rule_dict.values():
+            for expr in alternatives:
+                for symbol in expr:
+                    if symbol in rule_dict or symbol in seen or symbol == EPSILON or is_action(symbol):
+                        continue
+                    seen.add(symbol)
+                    self.terminals.append(symbol)
+        self.symbols = self.terminals + [END_MARKER, EPSILON]
+        self.bits = {symbol: 1 << i for i, symbol in enumerate(self.symbols)}
+        self.epsilon = self.bits[EPSILON]
+        self.first = {non_terminal: 0 for non_terminal in self.non_terminals}
+        self.follow = {non_terminal: 0 for non_terminal in self.non_terminals}
+        self.compute_first()
+        self.compute_follow()
+
+    def first_of(self, expr):
+        first = 0
+        for symbol in expr:
+            if symbol == EPSILON or is_action(symbol):
+                continue
+            if symbol not in self.first:
+                return first | self.bits[symbol]
+            first |= self.first[symbol] & ~self.epsilon
+            if not self.first[symbol] & self.epsilon:
+                return first
+        return first | self.epsilon
+
+    def compute_first(self):
+        changed = True
+        while changed:
+            changed = False
+            for lhs, alternatives in self.rules.items():
+                first = self.first[lhs]
+                for expr in alternatives:
+                    first |= self.first_of(expr)
+                if first != self.first[lhs]:
+                    self.first[lhs] = first
+                    changed = True
+
+    def compute_follow(self):
+        self.follow[self.start] = self.bits[END_MARKER]
+        changed = True
+        while changed:
+            changed = False
+            for lhs, alternatives in self.rules.items():
+                for expr in alternatives:
+                    trailer = self.follow[lhs]
+                    for symbol in reversed(expr):
+                        if symbol == EPSILON or is_action(symbol):
+                            continue
+                        if symbol not in self.follow:
+                            trailer = self.bits[symbol]
+                            continue
+                        if trailer & ~self.follow[symbol]:
+                            self.follow[symbol] |= trailer
+                            changed = True
+                        if self.first[symbol] & self.epsilon:
+                            trailer |= self.first[symbol] & ~self.epsilon
+                        else:
+                            trailer = self.first[symbol]
+
+    def get_names(self, bitset):
+        return [symbol for symbol in self.symbols if bitset & self.bits[symbol]]
+
+    def get_first(self):
+        return {non_terminal: self.get_names(first) for non_terminal, first in self.first.items()}
+
+    def get_follow(self):
+        return {non_terminal: self.get_names(follow) for non_terminal, follow in self.follow.items()}
+
+    def build_table(self):
+        table = {}
+        for lhs, alternatives in self.rules.items():
+            for index, expr in enumerate(alternatives):
+                first = self.first_of(expr)
+                lookahead = first & ~self.epsilon
+                if first & self.epsilon:
+                    lookahead |= self.follow[lhs]
+                for terminal in self.get_names(lookahead):
+                    current = table.setdefault((lhs, terminal), index)
+                    if current != index:
+                        raise ValueError(
+                            f"grammar is not LL(1): conflict on ({lhs}, {terminal}) between "
+                            f"'{' '.join(alternatives[current])}' and '{' '.join(expr)}'"
+                        )
+        return table
+
+    def to_data(self):
+        return {
+            "terminals": self.terminals,
+            "non-terminals": self.non_terminals,
+            "first": self.get_first(),
+            "follow": self.get_follow(),
+        }
+
+
+def check_grammar_data(grammar, data):
+    terminals, non_terminals, first, follow = data
+    mismatches = []
+    if set(terminals) != set(grammar.terminals):
+        mismatches.append("terminals")
+    if set(non_terminals) != set(grammar.non_terminals):
+        mismatches.append("non-terminals")
+    for name, expected, computed in (("first", first, grammar.get_first()), ("follow", follow, grammar.get_follow())):
+        for non_terminal in grammar.non_terminals:
+            if set(expected.get(non_terminal, [])) != set(computed[non_terminal]):
+                mismatches.append(f"{name}({non_terminal})")
+    return mismatches
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if arg != "--check"]
+    grammar_file = args[0] if args else "assets/grammar_with_actions.txt"
+    grammar = Grammar(convert_grammar_to_rule_dict(grammar_file))
+    grammar.build_table()
+    if "--check" in sys.argv:
+        mismatches = check_grammar_data(grammar, read_grammar_data())
+        for mismatch in mismatches:
+            print(f"mismatch: {mismatch}")
+        sys.exit(1 if mismatches else 0)
+    json.dump(grammar.to_data(), sys.stdout, indent=4)
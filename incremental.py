@@ -0,0 +1,350 @@
+from utils import *
+from scanner import Scanner, CHUNK_SIZE
+from symbol_table import SymbolTable, SymbolTableEntry, FunctionRecordEntry
+from parser_module import Parser, GRAMMAR_FILE, get_grammar_digest
+from codegen import CodeGenerator
+from profiler import measure
+from pb import OPERATION_CODES, OPERATION_IDS
+from itertools import islice
+import hashlib
+import marshal
+import os
+
+INCREMENTAL_CACHE = "incremental.cache"
+INCREMENTAL_CACHE_VERSION = 1
+SCRATCH_DATA_OFFSET = 4 << 20
+
+CODE = 0
+DATA = 1
+EXTERNAL = 2
+
+JP = OPERATION_IDS[Operation.Jp]
+JPF = OPERATION_IDS[Operation.Jpf]
+
+
+def split_declarations(tokens):
+    declarations = []
+    start = 0
+    depth = 0
+    for i, token in enumerate(tokens):
+        if token.type != TokenType.SYMBOL:
+            continue
+        if token.value == "{":
+            depth += 1
+        elif token.value == "}":
+            depth -= 1
+            if depth < 0:
+                return None
+            if depth == 0:
+                declarations.append(tokens[start:i + 1])
+                start = i + 1
+        elif token.value == ";" and depth == 0:
+            declarations.append(tokens[start:i + 1])
+            start = i + 1
+    if depth != 0 or start != len(tokens):
+        return None
+    return declarations
+
+
+def get_fingerprint(tokens):
+    text = "\0".join([token.value for token in tokens])
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def get_environment(symbol_table, tokens):
+    names = sorted({token.value for token in tokens if token.type == TokenType.ID})
+    return {name: symbol_table.lookup(name, 0) for name in names}
+
+
+def describe(entry):
+    if entry is None:
+        return None
+    if isinstance(entry, FunctionRecordEntry):
+        return "function", tuple(arg.type for arg in entry.args)
+    return "var", entry.type
+
+
+def get_fields(entry):
+    if not isinstance(entry, FunctionRecordEntry):
+        return {"address": int(entry.address)}
+    fields = {
+        "return_address": int(entry.return_address),
+        "return_value": int(entry.return_value),
+        "index": entry.index,
+    }
+    for i, arg in enumerate(entry.args):
+        fields[f"arg{i}"] = int(arg.address)
+    return fields
+
+
+def get_externals(environment):
+    code, data = {}, {}
+    for name, entry in environment.items():
+        if entry is None:
+            continue
+        for field, value in get_fields(entry).items():
+            if field == "index":
+                code[value + 1] = (name, field, 1)
+            else:
+                data[value] = (name, field, 0)
+    return code, data
+
+
+def is_idle(code_generator):
+    return (
+            code_generator.semantic_stack.empty()
+            and code_generator.return_frames.empty()
+            and code_generator.break_frames.empty()
+            and code_generator.current_scope == 0
+            and code_generator.symbol_table.args is None
+    )
+
+
+def split_operand(operand):
+    prefix = operand[:1] if operand[:1] in ("#", "@") else ""
+    value = operand[len(prefix):]
+    if not value.isdigit():
+        return None
+    return prefix, int(value)
+
+
+def get_operand_template(operand, scratch_operand, index, temp_address, code_delta, externals):
+    if operand == scratch_operand and (operand == "" or operand[0] == "#"):
+        return operand
+    real, scratch = split_operand(operand), split_operand(scratch_operand)
+    if real is None or scratch is None or real[0] != scratch[0]:
+        return None
+    prefix, value = real
+    delta = scratch[1] - value
+    if delta == code_delta:
+        return prefix, CODE, value - index
+    if delta == SCRATCH_DATA_OFFSET:
+        return prefix, DATA, value - temp_address
+    if delta == 0 and value in externals:
+        return (prefix, EXTERNAL) + externals[value]
+    return None
+
+
+def relocate(operand, index, temp_address, fields):
+    if type(operand) is str:
+        return operand
+    if operand[1] == CODE:
+        return f"{operand[0]}{index + operand[2]}"
+    if operand[1] == DATA:
+        return f"{operand[0]}{temp_address + operand[2]}"
+    return f"{operand[0]}{fields[operand[2]][operand[3]] + operand[4]}"
+
+
+def get_symbol_template(entry, index, temp_address, size, data_size):
+    if entry.scope != 0:
+        return None
+    if isinstance(entry, FunctionRecordEntry):
+        addresses = [entry.return_address, entry.return_value] + [arg.address for arg in entry.args]
+        if not all(0 <= int(address) - temp_address < data_size for address in addresses):
+            return None
+        if not 0 <= entry.index - index < size:
+            return None
+        args = tuple((arg.id, arg.type, int(arg.address) - temp_address, arg.scope) for arg in entry.args)
+        return (
+            "function", entry.id, int(entry.return_address) - temp_address,
+            int(entry.return_value) - temp_address, entry.index - index, args,
+        )
+    if not 0 <= int(entry.address) - temp_address < data_size:
+        return None
+    return "var", entry.id, entry.type, int(entry.address) - temp_address
+
+
+def make_symbol(template, index, temp_address):
+    if template[0] == "var":
+        return SymbolTableEntry(template[1], template[2], str(temp_address + template[3]), 0)
+    args = [
+        SymbolTableEntry(arg_id, arg_type, str(temp_address + offset), scope)
+        for arg_id, arg_type, offset, scope in template[5]
+    ]
+    return FunctionRecordEntry(
+        str(temp_address + template[2]), str(temp_address + template[3]), template[1], index + template[4], args, 0
+    )
+
+
+class IncrementalCompiler:
+    def __init__(self, parse_table, declarations=None):
+        self.parse_table = parse_table
+        self.declarations = declarations if declarations is not None else {}
+        self.reused = 0
+        self.compiled = 0
+
+    @staticmethod
+    def load(cache_file, parse_table):
+        try:
+            with open(cache_file, "rb") as f:
+                data = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            data = None
+        if (
+                not isinstance(data, dict)
+                or data.get("version") != INCREMENTAL_CACHE_VERSION
+                or data.get("digest") != get_grammar_digest(GRAMMAR_FILE)
+        ):
+            return IncrementalCompiler(parse_table)
+        return IncrementalCompiler(parse_table, data["declarations"])
+
+    def save(self, cache_file):
+        data = {
+            "version": INCREMENTAL_CACHE_VERSION,
+            "digest": get_grammar_digest(GRAMMAR_FILE),
+            "declarations": self.declarations,
+        }
+        temp_file = f"{cache_file}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(cache_file) or ".", exist_ok=True)
+            with open(temp_file, "wb") as f:
+                marshal.dump(data, f)
+            os.replace(temp_file, cache_file)
+        except OSError:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+
+    def parse_program(self, input_file, profiler=None, use_mmap=False):
+        scanner = Scanner(input_file, chunk_size=CHUNK_SIZE, use_mmap=use_mmap)
+        tokens = scanner.iter_tokens()
+        if profiler is not None:
+            tokens = profiler.wrap_tokens("scanner.get_next_token", tokens)
+        with measure(profiler, "scan"):
+            tokens = list(tokens)
+        scanner.close()
+        declarations = split_declarations(tokens)
+        if declarations is None or scanner.LEXICAL_ERRORS:
+            return None
+        end = scanner.get_next_token()
+        parser = Parser(scanner, self.parse_table.rule_dict, self.parse_table, build_tree=False)
+        if profiler is not None:
+            profiler.instrument_parser(parser)
+        self.reused = self.compiled = 0
+        used = {}
+        for declaration in declarations:
+            fingerprint = get_fingerprint(declaration)
+            entry = self.declarations.get(fingerprint)
+            if entry is not None and self.reuse(parser.code_generator, entry):
+                self.reused += 1
+            else:
+                entry = self.compile(parser, declaration + [end])
+                if parser.syntax_error:
+                    return None
+                self.compiled += 1
+            if entry is not None:
+                used[fingerprint] = entry
+        self.declarations = used
+        return parser
+
+    def reuse(self, code_generator, entry):
+        environment, code, temporaries, symbols, data_size = entry
+        if not is_idle(code_generator):
+            return False
+        symbol_table = code_generator.symbol_table
+        fields = {}
+        for name, shape in environment:
+            external = symbol_table.lookup(name, 0)
+            if describe(external) != shape:
+                return False
+            if external is not None:
+                fields[name] = get_fields(external)
+        index, temp_address = code_generator.index, code_generator.temp_address
+        program_block = code_generator.program_block
+        for operation, operand1, operand2, result in code:
+            program_block.emit(
+                OPERATION_CODES[operation],
+                relocate(operand1, index, temp_address, fields),
+                relocate(operand2, index, temp_address, fields),
+                relocate(result, index, temp_address, fields),
+            )
+        program_block.temporaries.update(str(temp_address + offset) for offset in temporaries)
+        for template in symbols:
+            symbol = make_symbol(template, index, temp_address)
+            symbol_table.append(symbol)
+            if template[0] == "var":
+                code_generator.error_logger.define_type(symbol.address, symbol.type)
+        code_generator.index += len(code)
+        code_generator.temp_address += data_size
+        return True
+
+    def compile(self, parser, tokens):
+        code_generator = parser.code_generator
+        environment = get_environment(code_generator.symbol_table, tokens) if is_idle(code_generator) else None
+        index, temp_address = code_generator.index, code_generator.temp_address
+        error_count, symbol_count = len(code_generator.error_logger.errors), len(code_generator.symbol_table)
+        parser.parse_tokens(tokens)
+        if (
+                environment is None
+                or parser.syntax_error
+                or len(code_generator.error_logger.errors) != error_count
+                or len(code_generator.symbol_table) < symbol_count
+                or not is_idle(code_generator)
+        ):
+            return None
+        size, data_size = code_generator.index - index, code_generator.temp_address - temp_address
+        added = islice(reversed(code_generator.symbol_table.entries), len(code_generator.symbol_table) - symbol_count)
+        symbols = [get_symbol_template(entry, index, temp_address, size, data_size) for entry in reversed(list(added))]
+        if None in symbols:
+            return None
+
+        scratch = self.compile_scratch(parser.scanner, tokens, environment, index, temp_address)
+        base = 0 if index else 1
+        if scratch.index - base != size or scratch.temp_address - temp_address - SCRATCH_DATA_OFFSET != data_size:
+            return None
+        code = self.get_code_template(code_generator.program_block, scratch.program_block, index, base, size,
+                                      temp_address, get_externals(environment))
+        if code is None:
+            return None
+        scratch_address = temp_address + SCRATCH_DATA_OFFSET
+        temporaries = tuple(sorted(int(address) - scratch_address for address in scratch.program_block.temporaries))
+        environment = tuple((name, describe(entry)) for name, entry in environment.items())
+        return environment, code, temporaries, tuple(symbols), data_size
+
+    def compile_scratch(self, scanner, tokens, environment, index, temp_address):
+        code_generator = CodeGenerator(scanner)
+        symbol_table = code_generator.symbol_table = code_generator.error_logger.symbol_table = SymbolTable()
+        for entry in environment.values():
+            if entry is not None:
+                symbol_table.append(entry)
+                if not isinstance(entry, FunctionRecordEntry):
+                    code_generator.error_logger.define_type(entry.address, entry.type)
+        code_generator.index = 0 if index else 1
+        code_generator.program_block.add_empty(code_generator.index)
+        code_generator.temp_address = temp_address + SCRATCH_DATA_OFFSET
+        Parser(scanner, None, self.parse_table, build_tree=False, code_generator=code_generator).parse_tokens(tokens)
+        return code_generator
+
+    @staticmethod
+    def get_code_template(program_block, scratch_block, index, base, size, temp_address, externals):
+        code_externals, data_externals = externals
+        code = []
+        for position in range(size):
+            i, j = index + position, base + position
+            operation = program_block.operations[i]
+            if operation != scratch_block.operations[j]:
+                return None
+            row = [operation]
+            for column, (real_column, scratch_column) in enumerate((
+                    (program_block.args1, scratch_block.args1),
+                    (program_block.args2, scratch_block.args2),
+                    (program_block.results, scratch_block.results),
+            )):
+                operand = program_block.operands[real_column[i]]
+                code_target = (operation == JP and column == 0 or operation == JPF and column == 1)
+                template = get_operand_template(
+                    operand, scratch_block.operands[scratch_column[j]], index, temp_address, base - index,
+                    code_externals if code_target and operand[:1] != "@" else data_externals,
+                )
+                if template is None:
+                    return None
+                row.append(template)
+            code.append(tuple(row))
+        return code
+
+
+def parse_incrementally(input_file, parse_table, cache_file, profiler=None, use_mmap=False):
+    compiler = IncrementalCompiler.load(cache_file, parse_table)
+    parser = compiler.parse_program(input_file, profiler, use_mmap)
+    if parser is not None:
+        compiler.save(cache_file)
+    return parser
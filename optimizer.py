@@ -0,0 +1,382 @@
+from utils import *
+from pb import ProgramBlock
+
+ARITHMETIC = {Operation.Add, Operation.Sub, Operation.Mult, Operation.Eq, Operation.Lt}
+JUMPS = {Operation.Jp, Operation.Jpf}
+
+
+def is_address(operand):
+    return operand != "" and operand[0] not in "#@"
+
+
+def is_indirect(operand):
+    return operand.startswith("@")
+
+
+def get_destination(code):
+    op = code[0]
+    if op in ARITHMETIC:
+        return code[3]
+    if op == Operation.Assign:
+        return code[2]
+    return None
+
+
+def get_sources(code):
+    op = code[0]
+    if op in ARITHMETIC:
+        return [1, 2]
+    if op in (Operation.Assign, Operation.Jpf, Operation.Print):
+        return [1]
+    return []
+
+
+def get_reads(code):
+    reads = []
+    for position in get_sources(code):
+        operand = code[position]
+        if is_address(operand):
+            reads.append(operand)
+        elif is_indirect(operand):
+            reads.append(operand[1:])
+    destination = get_destination(code)
+    if destination is not None and is_indirect(destination):
+        reads.append(destination[1:])
+    if code[0] == Operation.Jp and is_indirect(code[1]):
+        reads.append(code[1][1:])
+    return reads
+
+
+def get_operands(code):
+    if code[0] in ARITHMETIC:
+        return [1, 2, 3]
+    if code[0] == Operation.Assign:
+        return [1, 2]
+    return get_sources(code)
+
+
+def reads_indirectly(code):
+    return any(is_indirect(code[position]) for position in get_sources(code))
+
+
+def get_jump_target(code):
+    if code[0] == Operation.Jp and not is_indirect(code[1]):
+        return 1
+    if code[0] == Operation.Jpf and not is_indirect(code[2]):
+        return 2
+    return None
+
+
+class Optimizer:
+    def __init__(self, program_block):
+        self.program_block = program_block
+        self.code = [list(row) for row in program_block.rows()]
+        self.temporaries = set(program_block.temporaries)
+        self.code_cells = set()
+
+    def find_code_cells(self):
+        for code in self.code:
+            if code[0] == Operation.Empty:
+                return False
+            if code[0] == Operation.Jp and is_indirect(code[1]):
+                self.code_cells.add(code[1][1:])
+            if code[0] == Operation.Jpf and is_indirect(code[2]):
+                return False
+        for code in self.code:
+            destination = get_destination(code)
+            if destination in self.code_cells and (code[0] != Operation.Assign or not code[1].startswith("#")):
+                return False
+            for position in get_sources(code):
+                if code[position] in self.code_cells:
+                    return False
+        return not (self.code_cells & self.temporaries)
+
+    def is_code_immediate(self, code):
+        return code[0] == Operation.Assign and code[2] in self.code_cells
+
+    def get_return_sites(self):
+        return {int(code[1][1:]) for code in self.code if self.is_code_immediate(code)}
+
+    def get_successors(self, index, return_sites):
+        code = self.code[index]
+        if code[0] == Operation.Jp:
+            if is_indirect(code[1]):
+                return return_sites
+            return [int(code[1])]
+        if code[0] == Operation.Jpf:
+            return [index + 1, int(code[2])]
+        return [index + 1]
+
+    def get_leaders(self):
+        leaders = {0} | self.get_return_sites()
+        for index, code in enumerate(self.code):
+            if code[0] in JUMPS:
+                leaders.add(index + 1)
+                target = get_jump_target(code)
+                if target is not None:
+                    leaders.add(int(code[target]))
+        return leaders
+
+    def get_blocks(self):
+        leaders = sorted(leader for leader in self.get_leaders() if leader < len(self.code))
+        return list(zip(leaders, leaders[1:] + [len(self.code)]))
+
+    def compact(self, deleted):
+        if not deleted:
+            return False
+        remap = []
+        kept = 0
+        for index in range(len(self.code)):
+            remap.append(kept)
+            if index not in deleted:
+                kept += 1
+        remap.append(kept)
+        code_list = []
+        for index, code in enumerate(self.code):
+            if index in deleted:
+                continue
+            target = get_jump_target(code)
+            if target is not None:
+                code[target] = str(remap[min(int(code[target]), len(self.code))])
+            if self.is_code_immediate(code):
+                code[1] = f"#{remap[min(int(code[1][1:]), len(self.code))]}"
+            code_list.append(code)
+        self.code = code_list
+        return True
+
+    def thread_jumps(self):
+        changed = False
+        for code in self.code:
+            position = get_jump_target(code)
+            if position is None:
+                continue
+            target = int(code[position])
+            seen = set()
+            while target < len(self.code) and target not in seen:
+                seen.add(target)
+                next_code = self.code[target]
+                if next_code[0] != Operation.Jp:
+                    break
+                if is_indirect(next_code[1]):
+                    if code[0] == Operation.Jp:
+                        code[1] = next_code[1]
+                        changed = True
+                    break
+                target = int(next_code[1])
+            if code[0] == Operation.Jp and is_indirect(code[1]):
+                continue
+            if str(target) != code[position]:
+                code[position] = str(target)
+                changed = True
+        return changed
+
+    def remove_unreachable(self):
+        return_sites = sorted(self.get_return_sites())
+        reachable = set()
+        stack = [0]
+        while stack:
+            index = stack.pop()
+            if index in reachable or index >= len(self.code):
+                continue
+            reachable.add(index)
+            stack.extend(self.get_successors(index, return_sites))
+        return self.compact(set(range(len(self.code))) - reachable)
+
+    def remove_redundant_jumps(self):
+        deleted = set()
+        for index, code in enumerate(self.code):
+            position = get_jump_target(code)
+            if position is not None and int(code[position]) == index + 1:
+                deleted.add(index)
+        return self.compact(deleted)
+
+    def propagate_copies(self):
+        changed = False
+        for start, end in self.get_blocks():
+            for index in range(start, end):
+                code = self.code[index]
+                if code[0] != Operation.Assign or code[2] not in self.temporaries:
+                    continue
+                source, temp = code[1], code[2]
+                for next_code in self.code[index + 1:end]:
+                    for position in get_sources(next_code):
+                        if next_code[position] == temp:
+                            next_code[position] = source
+                            changed = True
+                    destination = get_destination(next_code)
+                    if destination == temp or destination == source:
+                        break
+                    if destination is not None and is_indirect(destination) and source not in self.temporaries:
+                        if not source.startswith("#"):
+                            break
+                    if is_indirect(source) and destination is not None:
+                        break
+        return changed
+
+    def get_live_temporaries(self):
+        blocks = self.get_blocks()
+        block_of = {}
+        for number, (start, end) in enumerate(blocks):
+            block_of[start] = number
+        accesses = {}
+        for number, (start, end) in enumerate(blocks):
+            for index in range(start, end):
+                code = self.code[index]
+                for cell in get_reads(code):
+                    if cell in self.temporaries:
+                        accesses.setdefault(cell, {}).setdefault(number, "use")
+                destination = get_destination(code)
+                if destination in self.temporaries:
+                    accesses.setdefault(destination, {}).setdefault(number, "def")
+        global_temps = sorted(
+            cell for cell, blocks_used in accesses.items()
+            if len(blocks_used) > 1 or "use" in blocks_used.values()
+        )
+        bits = {cell: 1 << bit for bit, cell in enumerate(global_temps)}
+
+        uses = [0] * len(blocks)
+        defs = [0] * len(blocks)
+        for number, (start, end) in enumerate(blocks):
+            for index in range(end - 1, start - 1, -1):
+                code = self.code[index]
+                destination = get_destination(code)
+                if destination in bits:
+                    defs[number] |= bits[destination]
+                    uses[number] &= ~bits[destination]
+                for cell in get_reads(code):
+                    if cell in bits:
+                        uses[number] |= bits[cell]
+
+        return_sites = sorted(self.get_return_sites())
+        successors = []
+        for start, end in blocks:
+            successors.append([
+                block_of[target] for target in self.get_successors(end - 1, return_sites)
+                if target < len(self.code)
+            ])
+        live_in = [0] * len(blocks)
+        live_out = [0] * len(blocks)
+        changed = True
+        while changed:
+            changed = False
+            for number in range(len(blocks) - 1, -1, -1):
+                out = 0
+                for successor in successors[number]:
+                    out |= live_in[successor]
+                new_in = uses[number] | (out & ~defs[number])
+                if out != live_out[number] or new_in != live_in[number]:
+                    live_out[number], live_in[number] = out, new_in
+                    changed = True
+        return blocks, bits, live_in, live_out
+
+    def iterate_live_cells(self, start, end, bits, live_out):
+        live = {cell for cell, bit in bits.items() if live_out & bit}
+        for index in range(end - 1, start - 1, -1):
+            code = self.code[index]
+            yield index, live
+            destination = get_destination(code)
+            if destination in self.temporaries:
+                live = live - {destination}
+            live = live | {cell for cell in get_reads(code) if cell in self.temporaries}
+
+    def forward_stores(self):
+        blocks, bits, live_in, live_out = self.get_live_temporaries()
+        deleted = set()
+        for number, (start, end) in enumerate(blocks):
+            for index, live in self.iterate_live_cells(start, end, bits, live_out[number]):
+                code = self.code[index]
+                if index == start or code[0] != Operation.Assign or not is_address(code[2]):
+                    continue
+                temp = code[1]
+                previous = self.code[index - 1]
+                if (
+                        temp in self.temporaries
+                        and temp not in live
+                        and index - 1 not in deleted
+                        and get_destination(previous) == temp
+                        and temp not in get_reads(previous)
+                ):
+                    if previous[0] == Operation.Assign:
+                        previous[2] = code[2]
+                    else:
+                        previous[3] = code[2]
+                    deleted.add(index)
+        return self.compact(deleted)
+
+    def remove_dead_stores(self):
+        blocks, bits, live_in, live_out = self.get_live_temporaries()
+        deleted = set()
+        for number, (start, end) in enumerate(blocks):
+            overwritten = set()
+            for index, live in self.iterate_live_cells(start, end, bits, live_out[number]):
+                code = self.code[index]
+                destination = get_destination(code)
+                if destination is not None and is_address(destination):
+                    if destination in self.temporaries:
+                        is_dead = destination not in live
+                    else:
+                        is_dead = destination in overwritten
+                    if is_dead:
+                        deleted.add(index)
+                        continue
+                    overwritten.add(destination)
+                if reads_indirectly(code) or code[0] in JUMPS:
+                    overwritten = set()
+                overwritten -= set(get_reads(code))
+        return self.compact(deleted)
+
+    def allocate_temporaries(self):
+        blocks, bits, live_in, live_out = self.get_live_temporaries()
+        fixed = {cell for cell, bit in bits.items() if live_in and live_in[0] & bit}
+        neighbours = {}
+        for number, (start, end) in enumerate(blocks):
+            for index, live in self.iterate_live_cells(start, end, bits, live_out[number]):
+                destination = get_destination(self.code[index])
+                if destination not in self.temporaries:
+                    continue
+                neighbours.setdefault(destination, set()).update(live)
+                for cell in live:
+                    neighbours.setdefault(cell, set()).add(destination)
+
+        order = {}
+        for code in self.code:
+            for position in get_operands(code):
+                cell = code[position].lstrip("@")
+                if cell in self.temporaries and cell not in fixed:
+                    order.setdefault(cell)
+        pool = sorted(order, key=int)
+        allocation = {}
+        for cell in order:
+            taken = {allocation[neighbour] for neighbour in neighbours.get(cell, ()) if neighbour in allocation}
+            allocation[cell] = next(address for address in pool if address not in taken)
+
+        for code in self.code:
+            for position in get_operands(code):
+                operand = code[position]
+                if operand in allocation:
+                    code[position] = allocation[operand]
+                elif is_indirect(operand) and operand[1:] in allocation:
+                    code[position] = "@" + allocation[operand[1:]]
+        self.temporaries = fixed | set(allocation.values())
+
+    def optimize(self):
+        if not self.find_code_cells():
+            return self.program_block
+        changed = True
+        while changed:
+            changed = self.thread_jumps()
+            changed = self.remove_unreachable() or changed
+            changed = self.remove_redundant_jumps() or changed
+            changed = self.propagate_copies() or changed
+            changed = self.forward_stores() or changed
+            changed = self.remove_dead_stores() or changed
+        self.allocate_temporaries()
+        program_block = ProgramBlock()
+        program_block.temporaries = self.temporaries
+        for operation, arg1, arg2, result in self.code:
+            program_block.emit(operation, arg1, arg2, result)
+        return program_block
+
+
+def optimize(program_block):
+    return Optimizer(program_block).optimize()
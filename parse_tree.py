@@ -0,0 +1,25 @@
+class ParseNode:
+    __slots__ = ("name", "children")
+
+    def __init__(self, name, parent=None):
+        self.name = name
+        self.children = []
+        if parent is not None:
+            parent.children.append(self)
+
+    def to_anytree(self):
+        from anytree import Node
+
+        root = Node(self.name)
+        stack = [(self, root)]
+        while stack:
+            node, converted = stack.pop()
+            for child in node.children:
+                stack.append((child, Node(child.name, parent=converted)))
+        return root
+
+    def __repr__(self):
+        return f"ParseNode({self.name!r}, {len(self.children)} children)"
+
+    def __str__(self):
+        return self.__repr__()
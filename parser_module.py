@@ -1,5 +1,9 @@
 from utils import *
 from codegen import CodeGenerator
+from parse_tree import ParseNode
+import hashlib
+import marshal
+import os
 
 START_PRODUCTION_RULE = "Program"
 NON_TERMINAL = "NON_TERMINAL"
@@ -7,90 +11,166 @@ SKIP = "SKIP"
 MATCH = "MATCH"
 MISMATCH = "MISMATCH"
 
+GRAMMAR_FILE = "assets/grammar_with_actions.txt"
+PARSE_TABLE_CACHE = "assets/parse_table.cache"
+PARSE_TABLE_VERSION = 2
+
+
+class ParseTable:
+    def __init__(self, rule_dict):
+        from grammar import Grammar
+
+        self.rule_dict = rule_dict
+        grammar = Grammar(rule_dict, START_PRODUCTION_RULE)
+        self.terminals = grammar.terminals
+        self.non_terminals = grammar.non_terminals
+        self.first = grammar.get_first()
+        self.follow = grammar.get_follow()
+        self.actions = []
+        self.action_ids = {}
+        self.table = {}
+        self.build_table(grammar)
+
+    def get_action_id(self, symbol):
+        name = symbol[1:]
+        if name not in self.action_ids:
+            self.action_ids[name] = len(self.actions)
+            self.actions.append(name)
+        return self.action_ids[name]
+
+    def compile_production(self, expr):
+        return tuple(
+            self.get_action_id(item) if item.startswith("#") else item for item in expr
+        )
+
+    def build_table(self, grammar):
+        productions = {
+            lhs: [self.compile_production(expr) for expr in alternatives]
+            for lhs, alternatives in self.rule_dict.items()
+        }
+        for (lhs, terminal), index in grammar.build_table().items():
+            self.table[(lhs, terminal)] = productions[lhs][index]
+
+    def get(self, non_terminal, terminal):
+        return self.table.get((non_terminal, terminal))
+
+    def to_cache(self, digest):
+        return {
+            "version": PARSE_TABLE_VERSION,
+            "digest": digest,
+            "terminals": self.terminals,
+            "non_terminals": self.non_terminals,
+            "first": self.first,
+            "follow": self.follow,
+            "actions": self.actions,
+            "table": self.table,
+        }
+
+    @staticmethod
+    def from_cache(data):
+        parse_table = ParseTable.__new__(ParseTable)
+        parse_table.rule_dict = None
+        parse_table.terminals = data["terminals"]
+        parse_table.non_terminals = data["non_terminals"]
+        parse_table.first = data["first"]
+        parse_table.follow = data["follow"]
+        parse_table.actions = data["actions"]
+        parse_table.action_ids = {name: i for i, name in enumerate(parse_table.actions)}
+        parse_table.table = data["table"]
+        return parse_table
+
+
+def get_grammar_digest(grammar_file):
+    with open(grammar_file, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def read_parse_table_cache(cache_file, digest):
+    try:
+        with open(cache_file, "rb") as f:
+            data = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != PARSE_TABLE_VERSION or data.get("digest") != digest:
+        return None
+    return ParseTable.from_cache(data)
+
+
+def write_parse_table_cache(cache_file, parse_table, digest):
+    temp_file = f"{cache_file}.{os.getpid()}.tmp"
+    try:
+        with open(temp_file, "wb") as f:
+            marshal.dump(parse_table.to_cache(digest), f)
+        os.replace(temp_file, cache_file)
+    except OSError:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+
+
+def load_parse_table(grammar_file=GRAMMAR_FILE, cache_file=PARSE_TABLE_CACHE):
+    digest = get_grammar_digest(grammar_file)
+    parse_table = read_parse_table_cache(cache_file, digest)
+    if parse_table is None:
+        parse_table = ParseTable(convert_grammar_to_rule_dict(grammar_file))
+        write_parse_table_cache(cache_file, parse_table, digest)
+    return parse_table
+
 
 class Parser:
-    def __init__(self, scanner, rule_dict):
+    def __init__(self, scanner, rule_dict, parse_table=None, build_tree=True, code_generator=None):
         self.scanner = scanner
-        self.code_generator = CodeGenerator(self.scanner)
+        self.code_generator = code_generator if code_generator is not None else CodeGenerator(self.scanner)
         self.rule_dict = rule_dict
-        self.transitionDiagrams = {}
-        self.createTDs()
+        self.parse_table = parse_table if parse_table is not None else ParseTable(rule_dict)
         self.stack = []
-        (
-            self.terminals,
-            self.non_terminals,
-            self.first,
-            self.follow,
-        ) = read_grammar_data()
+        self.terminals = self.parse_table.terminals
+        self.non_terminals = self.parse_table.non_terminals
+        self.first = self.parse_table.first
+        self.follow = self.parse_table.follow
+        self.routines = [self.code_generator.get_routine(name) for name in self.parse_table.actions]
+        self.build_tree = build_tree
         self.root = None
         self.syntax_error = []
-
-    def createTDs(self):
-        for x in self.rule_dict.items():
-            td = TransitionDiagram(x)
-            self.transitionDiagrams[td.lhs] = td
-
-    def compute_first(self, rhs):
-        first_list = []
-        for item in rhs:
-            if item.startswith("#"):
-                continue
-            if item in self.terminals:
-                first_list.append(item)
-                return first_list
-            elif item == EPSILON:
-                continue
-            else:
-                first = self.first[item].copy()
-                if EPSILON in first:
-                    first.remove(EPSILON)
-                first_list.extend(first)
-                if EPSILON not in self.first[item]:
-                    return first_list
-        first_list.append(EPSILON)
-        return first_list
+        self.tokens = self.scanner.iter_tokens()
 
     def get_next_token(self):
-        token = self.scanner.get_next_token()
-        while token is None or token.type == TokenType.WHITESPACE or token.type == TokenType.COMMENT:
-            token = self.get_next_token()
-        return token
+        for token in self.tokens:
+            return token
+        return self.scanner.get_next_token()
 
     def non_terminal_transition_error(self, token, transition):
         if token.value in self.follow[transition.value]:
             return True, f"#{token.line_num} : syntax error, missing {transition.value}"
         return False, f"#{token.line_num} : syntax error, illegal {token.value}"
 
-    def get_path_on_diagram(self, token, transition_diagram):
-        lhs, rhs = transition_diagram.derive_rules()
-        for expr in rhs:
-            if get_token_type_for_grammar(token) in self.compute_first(expr):
-                return expr
-        for expr in rhs:
-            if EPSILON in self.compute_first(expr):
-                if get_token_type_for_grammar(token) in self.follow[lhs]:
-                    return expr
-        if token.value == "$" and "$" in self.follow[lhs]:
-            for expr in rhs:
-                if EPSILON in self.compute_first(expr):
-                    if get_token_type_for_grammar(token) in self.follow[lhs]:
-                        return expr
+    def get_path_on_diagram(self, token, non_terminal):
+        return self.parse_table.get(non_terminal, get_token_type_for_grammar(token))
 
-        return None
+    def parse_tokens(self, tokens):
+        self.tokens = iter(tokens)
+        self.stack = []
+        self.parse()
 
     def parse(self):
+        build_tree = self.build_tree
+        routines = self.routines
+        non_terminals = set(self.non_terminals)
         is_eof = False
         token = self.get_next_token()
         self.stack.append(("Program", None))
         while self.stack[-1][0] != "$":
             current_expression = self.stack[-1][0]
 
-            if current_expression.startswith("#"):
-                self.code_generator.call_routine(current_expression, token)
+            if type(current_expression) is int:
+                routine, takes_token = routines[current_expression]
+                if takes_token:
+                    routine(token)
+                else:
+                    routine()
                 self.stack.pop()
                 continue
             if (
-                    current_expression not in self.non_terminals
+                    current_expression not in non_terminals
                     or current_expression == EPSILON
             ):
                 if (
@@ -99,9 +179,11 @@ class Parser:
                 ):
                     current_node, parent = self.stack.pop()
                     if current_expression == EPSILON:
-                        Node(current_expression, parent)
+                        if build_tree:
+                            ParseNode(current_expression, parent)
                     else:
-                        Node(f"({str(token.type)}, {token.value})", parent=parent)
+                        if build_tree:
+                            ParseNode(f"({str(token.type)}, {token.value})", parent)
                         token = self.get_next_token()
                 else:
                     self.stack.pop()
@@ -109,11 +191,11 @@ class Parser:
                         f"#{token.line_num} : syntax error, missing {current_expression}"
                     )
             else:
-                transition_diagram = self.transitionDiagrams[current_expression]
-                path_on_diagram = self.get_path_on_diagram(token, transition_diagram)
+                path_on_diagram = self.get_path_on_diagram(token, current_expression)
                 if path_on_diagram is not None:
                     current_node, parent = self.stack.pop()
-                    parent = Node(current_node, parent=parent)
+                    if build_tree:
+                        parent = ParseNode(current_node, parent)
                     if current_node == "Program":
                         self.root = parent
                         self.stack.append(("$", parent))
@@ -139,8 +221,8 @@ class Parser:
                             f"#{token.line_num} : syntax error, illegal {get_token_type_for_grammar(token)}"
                         )
                         token = self.get_next_token()
-        if not is_eof:
-            Node("$", self.root)
+        if build_tree and not is_eof and self.root is not None:
+            ParseNode("$", self.root)
 
 
 def main():
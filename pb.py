@@ -1,8 +1,25 @@
 from utils import *
-from typing import List, OrderedDict, Union
+from array import array
+
+OPERATION_CODES = [
+    Operation.Empty,
+    Operation.Add,
+    Operation.Mult,
+    Operation.Sub,
+    Operation.Eq,
+    Operation.Lt,
+    Operation.Assign,
+    Operation.Jpf,
+    Operation.Jp,
+    Operation.Print,
+]
+OPERATION_IDS = {operation: code for code, operation in enumerate(OPERATION_CODES)}
+OPERATION_NAMES = [str(operation) for operation in OPERATION_CODES]
 
 
 class Instruction:
+    __slots__ = ("operation", "arg1", "arg2", "result")
+
     def __init__(self, operation: Operation, arg1, arg2, result):
         self.operation = operation
         self.arg1 = arg1
@@ -19,29 +36,93 @@ class Instruction:
 
 class ProgramBlock:
     def __init__(self):
-        self.instructions = []
+        self.operations = array("B")
+        self.args1 = array("i")
+        self.args2 = array("i")
+        self.results = array("i")
+        self.operands = [""]
+        self.operand_ids = {"": 0}
+        self.temporaries = set()
+
+    def intern(self, operand):
+        if type(operand) is not str:
+            operand = str(operand)
+        operand_id = self.operand_ids.get(operand)
+        if operand_id is None:
+            operand_id = self.operand_ids[operand] = len(self.operands)
+            self.operands.append(operand)
+        return operand_id
 
     @property
     def i(self):
-        return len(self.instructions)
+        return len(self.operations)
 
     @i.setter
     def i(self, value):
         if value < self.i:
-            self.instructions = self.instructions[:value]
+            for column in (self.operations, self.args1, self.args2, self.results):
+                del column[value:]
         else:
-            self.instructions.extend(
-                [Instruction.empty() for _ in range(value - self.i)]
-            )
+            self.add_empty(value - self.i)
+
+    def emit(self, operation, arg1="", arg2="", result=""):
+        self.operations.append(OPERATION_IDS[operation])
+        self.args1.append(self.intern(arg1))
+        self.args2.append(self.intern(arg2))
+        self.results.append(self.intern(result))
+
+    def add_empty(self, count=1):
+        self.operations.extend(bytes(count))
+        for column in (self.args1, self.args2, self.results):
+            column.extend(array("i", bytes(4 * count)))
+
+    def set(self, index, operation, arg1="", arg2="", result=""):
+        self.operations[index] = OPERATION_IDS[operation]
+        self.args1[index] = self.intern(arg1)
+        self.args2[index] = self.intern(arg2)
+        self.results[index] = self.intern(result)
 
     def append(self, instruction):
-        self.instructions.append(instruction)
+        self.emit(instruction.operation, instruction.arg1, instruction.arg2, instruction.result)
+
+    def rows(self):
+        operands = self.operands
+        for operation, arg1, arg2, result in zip(self.operations, self.args1, self.args2, self.results):
+            yield OPERATION_CODES[operation], operands[arg1], operands[arg2], operands[result]
+
+    @property
+    def instructions(self):
+        return [Instruction(*row) for row in self.rows()]
+
+    def format(self):
+        operands = self.operands
+        return "".join([
+            f"{i}\t({OPERATION_NAMES[operation]}, {operands[arg1]}, {operands[arg2]}, {operands[result]})\n"
+            for i, (operation, arg1, arg2, result) in enumerate(
+                zip(self.operations, self.args1, self.args2, self.results)
+            )
+        ])
+
+    def write(self, output):
+        output.write(self.format())
+
+    def __len__(self):
+        return len(self.operations)
+
+    def __iter__(self):
+        return (Instruction(*row) for row in self.rows())
 
     def __setitem__(self, key, value):
-        self.instructions[key] = value
+        self.set(key, value.operation, value.arg1, value.arg2, value.result)
 
     def __getitem__(self, key):
-        return self.instructions[key]
+        operands = self.operands
+        return Instruction(
+            OPERATION_CODES[self.operations[key]],
+            operands[self.args1[key]],
+            operands[self.args2[key]],
+            operands[self.results[key]],
+        )
 
     def __str__(self):
-        return "\n".join([f"{i}\t{inst}" for i, inst in enumerate(self.instructions)])
+        return "\n".join([f"{i}\t{inst}" for i, inst in enumerate(self)])
@@ -0,0 +1,83 @@
+from contextlib import contextmanager, nullcontext
+import time
+
+SYMBOL_TABLE_METHODS = ["lookup", "last_function", "function_of"]
+
+
+class Profiler:
+    def __init__(self):
+        self.calls = {}
+        self.phases = {}
+
+    def wrap(self, name, function):
+        stats = self.calls.setdefault(name, [0, 0.0])
+        perf_counter = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stats[0] += 1
+                stats[1] += perf_counter() - start
+
+        return timed
+
+    def wrap_tokens(self, name, tokens):
+        stats = self.calls.setdefault(name, [0, 0.0])
+        perf_counter = time.perf_counter
+        while True:
+            start = perf_counter()
+            try:
+                token = next(tokens)
+            except StopIteration:
+                return
+            finally:
+                stats[0] += 1
+                stats[1] += perf_counter() - start
+            yield token
+
+    def instrument(self, obj, method, name):
+        setattr(obj, method, self.wrap(name, getattr(obj, method)))
+
+    def instrument_parser(self, parser):
+        parser.tokens = self.wrap_tokens("scanner.get_next_token", parser.tokens)
+        self.instrument(parser, "get_path_on_diagram", "parser.get_path_on_diagram")
+        parser.routines = [
+            (self.wrap(f"action.{name}", routine), takes_token)
+            for name, (routine, takes_token) in zip(parser.parse_table.actions, parser.routines)
+        ]
+        for method in SYMBOL_TABLE_METHODS:
+            self.instrument(parser.code_generator.symbol_table, method, f"symbol_table.{method}")
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def report(self, input_file):
+        return {
+            "input": input_file,
+            "phases": {name: round(seconds, 6) for name, seconds in self.phases.items()},
+            "calls": {
+                name: {"count": count, "seconds": round(seconds, 6)}
+                for name, (count, seconds) in sorted(self.calls.items(), key=lambda item: -item[1][1])
+                if count
+            },
+        }
+
+
+def measure(profiler, name):
+    if profiler is None:
+        return nullcontext()
+    return profiler.phase(name)
+
+
+def write_report(report, output_file):
+    import json
+
+    with open(output_file, "w") as f:
+        json.dump(report, f, indent=4)
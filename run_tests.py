@@ -0,0 +1,151 @@
+from utils import *
+from parser_module import load_parse_table
+from compiler import compile_program, init_worker
+from vm import VirtualMachine, VMError
+from bytecode import decode_program
+import argparse
+import compiler
+import difflib
+import multiprocessing
+import os
+import sys
+import time
+
+SUITES = ["PA3_testcases", "PA4_testcases"]
+MAX_STEPS = 10000000
+
+
+def parse_args():
+    arg_parser = argparse.ArgumentParser(description="Compile and check every test case in-process.")
+    arg_parser.add_argument(
+        "suites", nargs="*", default=SUITES, help="test suite directories or single test case directories"
+    )
+    arg_parser.add_argument("-j", "--jobs", type=int, default=0, help="worker processes (0 uses every CPU)")
+    arg_parser.add_argument("-O", "--optimize", action="store_true", help="test the optimized code")
+    arg_parser.add_argument(
+        "--strict", action="store_true", help="also require output.txt to match when expected.txt exists"
+    )
+    arg_parser.add_argument("-v", "--verbose", action="store_true", help="print a diff for every mismatch")
+    return arg_parser.parse_args()
+
+
+def read_expected(case_dir, name):
+    path = os.path.join(case_dir, name)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return f.read()
+
+
+def normalize(text):
+    return [" ".join(line.split()) for line in text.strip().splitlines()]
+
+
+def compare(name, expected, actual, mismatches, verbose):
+    if normalize(expected) == normalize(actual):
+        return
+    diff = ""
+    if verbose:
+        diff = "\n".join(difflib.unified_diff(
+            normalize(expected), normalize(actual), f"expected/{name}", f"actual/{name}", lineterm=""
+        ))
+    mismatches.append((name, diff))
+
+
+def run_program(bytecode):
+    vm = VirtualMachine(decode_program(bytecode))
+    try:
+        vm.run(MAX_STEPS)
+    except VMError as error:
+        return f"{error}\n"
+    if vm.steps >= MAX_STEPS:
+        return f"did not halt within {MAX_STEPS} steps\n"
+    return "".join(f"PRINT    {value}\n" for value in vm.outputs)
+
+
+class CaseResult:
+    def __init__(self, case_dir, status, seconds=0.0, mismatches=None, error=None):
+        self.case_dir = case_dir
+        self.status = status
+        self.seconds = seconds
+        self.mismatches = mismatches or []
+        self.error = error
+
+    def __str__(self):
+        line = f"{self.status:<5} {self.case_dir} ({self.seconds * 1000:.1f} ms)"
+        if self.error is not None:
+            line += f": {self.error}"
+        if self.mismatches:
+            line += ": " + ", ".join(name for name, diff in self.mismatches)
+        return line
+
+
+def run_case(case_dir, parse_table, optimize_code=False, strict=False, verbose=False):
+    input_file = os.path.join(case_dir, "input.txt")
+    if not os.path.exists(input_file):
+        return CaseResult(case_dir, "SKIP", error="no input.txt")
+    start = time.perf_counter()
+    try:
+        result = compile_program(input_file, parse_table, optimize_code, bytecode=True)
+        mismatches = []
+        semantic_errors = read_expected(case_dir, "semantic_errors.txt")
+        if semantic_errors is not None:
+            compare("semantic_errors.txt", semantic_errors, result.semantic_errors, mismatches, verbose)
+        expected_prints = read_expected(case_dir, "expected.txt")
+        if expected_prints is not None and result.bytecode is not None:
+            compare("expected.txt", expected_prints, run_program(result.bytecode), mismatches, verbose)
+        output = read_expected(case_dir, "output.txt")
+        if output is not None and (strict or expected_prints is None or result.bytecode is None):
+            compare("output.txt", output, result.output, mismatches, verbose)
+    except Exception as error:
+        return CaseResult(case_dir, "ERROR", time.perf_counter() - start, error=repr(error))
+    return CaseResult(case_dir, "FAIL" if mismatches else "PASS", time.perf_counter() - start, mismatches)
+
+
+def is_case(directory):
+    return any(os.path.exists(os.path.join(directory, name)) for name in ("input.txt", "expected.txt"))
+
+
+def find_cases(suites):
+    cases = []
+    for suite in suites:
+        if is_case(suite):
+            cases.append(suite)
+            continue
+        for name in sorted(os.listdir(suite)):
+            if os.path.isdir(os.path.join(suite, name)):
+                cases.append(os.path.join(suite, name))
+    return cases
+
+
+def run_in_worker(job):
+    return run_case(job[0], compiler.worker_parse_table, *job[1:])
+
+
+def run_cases(cases, optimize_code=False, strict=False, verbose=False, jobs=0):
+    parse_table = load_parse_table()
+    jobs = min(jobs or os.cpu_count(), len(cases))
+    if jobs <= 1:
+        return [run_case(case, parse_table, optimize_code, strict, verbose) for case in cases]
+    with multiprocessing.Pool(jobs, initializer=init_worker, initargs=(parse_table,)) as pool:
+        return pool.map(run_in_worker, [(case, optimize_code, strict, verbose) for case in cases])
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    start = time.perf_counter()
+    cases = find_cases(args.suites)
+    if not cases:
+        sys.exit(f"no test cases found in {', '.join(args.suites)}")
+    results = run_cases(cases, args.optimize, args.strict, args.verbose, args.jobs)
+    for result in results:
+        print(result)
+        for name, diff in result.mismatches:
+            if diff:
+                print(diff)
+    counts = {}
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+    summary = ", ".join(f"{count} {status.lower()}" for status, count in sorted(counts.items()))
+    print(f"{len(results)} cases in {time.perf_counter() - start:.2f}s: {summary}")
+    sys.exit(1 if counts.get("FAIL") or counts.get("ERROR") else 0)
@@ -1,7 +1,55 @@
 from utils import *
+from symbol_table import SymbolTableEntry, FunctionRecordEntry, SymbolTable
+import mmap
+import re
+
+CHUNK_SIZE = 1 << 16
+MAX_CHAR_WIDTH = 4
+NEED_MORE = object()
+
+WHITESPACE_RUN = re.compile(rb"[ \t\n\r\x0b\x0c]+")
+
+
+def get_byte_class(predicate):
+    return b"[" + b"".join(re.escape(bytes([i])) for i in range(128) if predicate(i)) + b"]"
+
+
+SPACE = get_byte_class(lambda i: CHAR_CLASSES[i] in (CLASS_WHITESPACE, CLASS_NEWLINE))
+DIGIT = get_byte_class(lambda i: CHAR_CLASSES[i] == CLASS_DIGIT)
+WORD = get_byte_class(lambda i: CHAR_CLASSES[i] in (CLASS_DIGIT, CLASS_LETTER))
+LETTER = get_byte_class(lambda i: CHAR_CLASSES[i] == CLASS_LETTER)
+WORD_FOLLOWER = get_byte_class(
+    lambda i: CHAR_CLASSES[i] in (CLASS_SYMBOL, CLASS_EQUAL, CLASS_STAR, CLASS_SIGN, CLASS_WHITESPACE, CLASS_NEWLINE)
+)
+SYMBOL = get_byte_class(lambda i: CHAR_CLASSES[i] == CLASS_SYMBOL)
+SIGN = get_byte_class(lambda i: CHAR_CLASSES[i] == CLASS_SIGN)
+EQUAL_FOLLOWER = get_byte_class(lambda i: EQUAL_FOLLOWERS[i])
+STAR_FOLLOWER = get_byte_class(lambda i: CHAR_CLASSES[i] not in (CLASS_INVALID, CLASS_SLASH))
+SIGN_FOLLOWER = get_byte_class(lambda i: CHAR_CLASSES[i] != CLASS_INVALID)
+
+# whitespace, then an ASCII word or symbol that the DFA would accept on its next character;
+# anything that needs an invalid, non-ASCII or unread character takes scan_table_token
+TOKEN_RUN = re.compile(
+    b"(" + SPACE + b"*)((?:" + LETTER + WORD + b"*|" + DIGIT + b"+)(?=" + WORD_FOLLOWER + b")|"
+    + SYMBOL + b"|==|=(?=" + EQUAL_FOLLOWER + b")|\\*(?=" + STAR_FOLLOWER + b")|" + SIGN + b"(?=" + SIGN_FOLLOWER
+    + b"))"
+)
+
+NUM_STATE = 0
+ID_STATE = 1
+ACCEPT = 2
+REJECT = 3
+
+DFA_TRANSITIONS = {
+    # columns follow the CLASS_* order: digit, letter, symbol, =, *, +/-, whitespace, newline, /, invalid
+    NUM_STATE: [NUM_STATE, REJECT, ACCEPT, ACCEPT, ACCEPT, ACCEPT, ACCEPT, ACCEPT, REJECT, REJECT],
+    ID_STATE: [ID_STATE, ID_STATE, ACCEPT, ACCEPT, ACCEPT, ACCEPT, ACCEPT, ACCEPT, REJECT, REJECT],
+}
 
 
 class Token:
+    __slots__ = ("type", "value", "line_num")
+
     def __init__(self, token_type, value, line_num):
         self.type = token_type
         self.value = value
@@ -14,60 +62,23 @@ class Token:
         return str(self)
 
 
-class SymbolTableEntry:
-    def __init__(self, symbol_id, symbol_type, address, scope):
-        self.id = symbol_id
-        self.type = symbol_type
-        self.address = address
-        self.scope = scope
-
-    def __str__(self):
-        return f"({self.id}, {self.type}, {self.address}, {self.scope})"
-
-    def __repr__(self):
-        return str(self)
-
-
-class FunctionRecordEntry(SymbolTableEntry):
-    def __init__(
-            self,
-            return_address,
-            return_value,
-            func_id,
-            index,
-            symbol_table,
-            args_start,
-            scope,
-    ):
-        super().__init__(func_id, "function", "", scope)
-        self.return_address = return_address
-        self.return_value = return_value
-        self.index = index
-        self.args = symbol_table[args_start + 1:]
-        self.temp_vars = []
-
-    @staticmethod
-    def empty_instance():
-        empty = FunctionRecordEntry("", "", "", "", [0, 0], 0, -1)
-        empty.args = []
-        return empty
-
-    def __repr__(self):
-        return f"({self.id}, {self.type}, [{self.return_value}, {self.args}, {self.return_address}, {self.index}], {self.scope})"
-
-    def __str__(self):
-        return self.__repr__()
-
-
 class Scanner:
-    def __init__(self, input_file):
+    def __init__(self, input_file, table_driven=False, chunk_size=None, keep_tokens=False, use_mmap=False):
         self.SYMBOL_TABLE = OrderedDict()
         self.LEXICAL_ERRORS = OrderedDict()
         self.init_scanners()
         self.input_file = input_file
+        self.table_driven = table_driven or chunk_size is not None or use_mmap
+        self.chunk_size = chunk_size
+        self.use_mmap = use_mmap
+        self.keep_tokens = keep_tokens
         self.lines = ""
+        self.buffer = b""
+        self.source = None
+        self.exhausted = True
 
         self.tokens = OrderedDict()
+        self.table_tokens = self.generate_table_tokens()
 
         self.line_num = 1
         self.curser = 0
@@ -85,7 +96,8 @@ class Scanner:
             "until",
             "void",
         ]
-        self.SYMBOL_TABLE["id"] = []
+        self.keywords = set(self.SYMBOL_TABLE["keyword"])
+        self.SYMBOL_TABLE["id"] = SymbolTable()
         self.SYMBOL_TABLE["names"] = []
 
     def get_type_from_symbol_table(self, token):
@@ -99,11 +111,32 @@ class Scanner:
         self.LEXICAL_ERRORS[token.line_num].append(error)
 
     def read_input(self):
+        if self.use_mmap:
+            with open(self.input_file, "rb") as f:
+                try:
+                    self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:
+                    self.buffer = b""
+            return
+        if self.chunk_size is not None:
+            self.source = open(self.input_file, "rb")
+            self.exhausted = False
+            return
         with open(self.input_file, "r") as f:
             lines = [line for line in f.readlines()]
-            for line in range(1, len(lines) + 1):
-                self.tokens[line] = []
             self.lines = "".join(lines)
+        if self.table_driven:
+            self.buffer = self.lines.encode("utf-8")
+            self.lines = ""
+
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        if self.source is not None:
+            self.source.close()
+        self.buffer = b""
+        self.curser = 0
+        self.exhausted = True
 
     def get_current_char(self):
         return self.lines[self.curser]
@@ -206,6 +239,8 @@ class Scanner:
         return Token(TokenType.COMMENT, comment, self.line_num), True
 
     def get_next_token(self):
+        if self.table_driven:
+            return self.get_next_table_token()
         if self.is_eof():
             return Token("END", "$", self.line_num)
         current_char = self.get_current_char()
@@ -273,16 +308,255 @@ class Scanner:
                 (current_char, "Invalid input"),
             )
 
+    def decode_char(self, position):
+        lead = self.buffer[position]
+        width = 2 if lead < 0xE0 else 3 if lead < 0xF0 else 4
+        try:
+            return bytes(self.buffer[position:position + width]).decode("utf-8"), width
+        except UnicodeDecodeError:
+            return "\ufffd", 1
+
+    def decode(self, start, end):
+        text = bytes(self.buffer[start:end]).decode("utf-8", "replace")
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return text
+
+    def get_char_class(self, position):
+        char_class = CHAR_CLASSES[self.buffer[position]]
+        if char_class != CLASS_NON_ASCII:
+            return char_class, 1
+        char, width = self.decode_char(position)
+        return TOKEN_TYPE_CLASSES[get_token_type(char)], width
+
+    def can_follow_equal(self, position):
+        if self.buffer[position] < 128:
+            return EQUAL_FOLLOWERS[self.buffer[position]]
+        return can_follow_equal(self.decode_char(position)[0])
+
+    def get_limit(self):
+        if self.exhausted:
+            return len(self.buffer)
+        return len(self.buffer) - MAX_CHAR_WIDTH
+
+    def read_chunk(self):
+        data = self.source.read(max(self.chunk_size, len(self.buffer) - self.curser))
+        self.buffer = self.buffer[self.curser:] + data
+        self.curser = 0
+        if not data:
+            self.exhausted = True
+            self.source.close()
+
+    def scan_word(self, start, width, state):
+        buffer = self.buffer
+        limit = self.get_limit()
+        position = start + width
+        while position < limit:
+            char_class = CHAR_CLASSES[buffer[position]]
+            width = 1
+            if char_class == CLASS_NON_ASCII:
+                char_class, width = self.get_char_class(position)
+            state = DFA_TRANSITIONS[state][char_class]
+            if state == ACCEPT:
+                break
+            position += width
+            if state == REJECT:
+                break
+        else:
+            if not self.exhausted:
+                return NEED_MORE, False
+        self.curser = position
+        return self.decode(start, position), state == REJECT
+
+    def scan_symbol(self, start, char_class):
+        buffer = self.buffer
+        lexeme_end = start + 1
+        token_type = TokenType.SYMBOL
+        if lexeme_end < len(buffer):
+            next_class, width = self.get_char_class(lexeme_end)
+            if char_class == CLASS_EQUAL:
+                if next_class == CLASS_EQUAL:
+                    lexeme_end += 1
+                elif not self.can_follow_equal(lexeme_end):
+                    lexeme_end += width
+                    token_type = TokenType.INVALID
+            elif char_class == CLASS_STAR and next_class == CLASS_SLASH:
+                self.curser = lexeme_end + 1
+                return self.add_lexical_error(
+                    Token(TokenType.UNMATCHED_COMMENT, "*/", self.line_num), ("*/", "Unmatched comment")
+                )
+            elif char_class in (CLASS_STAR, CLASS_SIGN) and next_class == CLASS_INVALID:
+                lexeme_end += width
+                token_type = TokenType.INVALID
+        self.curser = lexeme_end
+        token = Token(token_type, self.decode(start, lexeme_end), self.line_num)
+        if token_type == TokenType.INVALID:
+            self.add_lexical_error(token, (token.value, "Invalid input"))
+        return token
+
+    def scan_comment(self, start):
+        buffer = self.buffer
+        if start + 1 >= len(buffer) or buffer[start + 1] != ord("*"):
+            lexeme_end = start + 1
+            if lexeme_end < len(buffer):
+                next_class, width = self.get_char_class(lexeme_end)
+                if next_class == CLASS_INVALID:
+                    lexeme_end += width
+            self.curser = lexeme_end
+            comment = self.decode(start, lexeme_end)
+            return self.add_lexical_error(
+                Token(TokenType.COMMENT, comment, self.line_num),
+                (print_short_comment(comment), "Invalid input"),
+            )
+        comment_end = buffer.find(b"*/", start + 2)
+        if comment_end != -1:
+            self.curser = comment_end + 2
+            return Token(TokenType.COMMENT, self.decode(start, self.curser), self.line_num)
+        if not self.exhausted:
+            return NEED_MORE
+        self.curser = len(buffer)
+        comment = self.decode(start, start + 32).rstrip("\ufffd")
+        return self.add_lexical_error(
+            Token(TokenType.COMMENT, comment, self.line_num),
+            (print_short_comment(comment), "Unclosed comment"),
+        )
+
+    def get_next_table_token(self):
+        return next(self.table_tokens)
+
+    def generate_table_tokens(self):
+        names = self.SYMBOL_TABLE["names"]
+        keywords = self.keywords
+        while True:
+            buffer = self.buffer
+            limit = self.get_limit()
+            line_num = self.line_num
+            for match in TOKEN_RUN.finditer(buffer, self.curser, limit):
+                if match.start() != self.curser:
+                    break
+                space, lexeme = match.groups()
+                if space:
+                    line_num += space.count(b"\n")
+                    if b"\r" in space:
+                        line_num += space.count(b"\r") - space.count(b"\r\n")
+                    self.line_num = line_num
+                self.curser = match.end()
+                value = lexeme.decode()
+                char_class = CHAR_CLASSES[lexeme[0]]
+                if char_class == CLASS_DIGIT:
+                    yield Token(TokenType.NUM, value, line_num)
+                elif char_class != CLASS_LETTER:
+                    yield Token(TokenType.SYMBOL, value, line_num)
+                elif value in keywords:
+                    yield Token(TokenType.KEYWORD, value, line_num)
+                else:
+                    names.append(SymbolTableEntry(value, TokenType.ID, None, None))
+                    yield Token(TokenType.ID, value, line_num)
+            token = self.scan_table_token()
+            while token is NEED_MORE:
+                self.read_chunk()
+                token = self.scan_table_token()
+            if token is not None and token.type == "END":
+                self.close()
+            yield token
+
+    def scan_table_token(self):
+        buffer = self.buffer
+        position = self.curser
+        limit = self.get_limit()
+        if position >= limit:
+            if not self.exhausted:
+                return NEED_MORE
+            if position >= len(buffer):
+                return Token("END", "$", self.line_num)
+        char_class = CHAR_CLASSES[buffer[position]]
+        if char_class == CLASS_WHITESPACE or char_class == CLASS_NEWLINE:
+            start, position = position, WHITESPACE_RUN.match(buffer, position).end()
+            if position >= limit and not self.exhausted:
+                return NEED_MORE
+            whitespace = buffer[start:position]
+            self.line_num += whitespace.count(b"\n") + whitespace.count(b"\r") - whitespace.count(b"\r\n")
+            self.curser = position
+            if position >= len(buffer):
+                return Token("END", "$", self.line_num)
+            char_class = CHAR_CLASSES[buffer[position]]
+
+        if char_class == CLASS_SYMBOL:
+            self.curser = position + 1
+            return Token(TokenType.SYMBOL, chr(buffer[position]), self.line_num)
+
+        width = 1
+        if char_class == CLASS_NON_ASCII:
+            char_class, width = self.get_char_class(position)
+
+        if char_class == CLASS_DIGIT:
+            num, is_invalid = self.scan_word(position, width, NUM_STATE)
+            if num is NEED_MORE:
+                return NEED_MORE
+            if is_invalid:
+                return self.add_lexical_error(
+                    Token(TokenType.INVALID, num, self.line_num), (num, "Invalid number")
+                )
+            return Token(TokenType.NUM, num, self.line_num)
+
+        if char_class == CLASS_LETTER:
+            name, is_invalid = self.scan_word(position, width, ID_STATE)
+            if name is NEED_MORE:
+                return NEED_MORE
+            if is_invalid:
+                return self.add_lexical_error(
+                    Token(TokenType.INVALID, name, self.line_num), (name, "Invalid input")
+                )
+            if name in self.keywords:
+                return Token(TokenType.KEYWORD, name, self.line_num)
+            self.SYMBOL_TABLE["names"].append(SymbolTableEntry(name, TokenType.ID, None, None))
+            return Token(TokenType.ID, name, self.line_num)
+
+        if char_class == CLASS_SLASH:
+            return self.scan_comment(position)
+
+        if char_class == CLASS_INVALID:
+            self.curser = position + width
+            char = self.decode(position, self.curser)
+            return self.add_lexical_error(
+                Token(TokenType.INVALID, char, self.line_num), (char, "Invalid input")
+            )
+
+        return self.scan_symbol(position, char_class)
+
     def is_eof(self):
+        if self.table_driven:
+            return self.exhausted and self.curser >= len(self.buffer)
         return self.curser >= len(self.lines)
 
-    def read_tokens(self):
+    def iter_tokens(self):
+        if self.table_driven:
+            return self.iter_table_tokens()
+        return self.iter_default_tokens()
+
+    def iter_default_tokens(self):
         while not self.is_eof():
             token = self.get_next_token()
-            if (
-                    token
-                    and token.type != TokenType.WHITESPACE
-                    and token.type != TokenType.COMMENT
-                    and token.type != TokenType.INVALID
-            ):
-                self.tokens[token.line_num].append(token)
+            if token is None or token.type == TokenType.COMMENT:
+                continue
+            if token.type == "END":
+                return
+            if self.keep_tokens and token.type != TokenType.INVALID:
+                self.tokens.setdefault(token.line_num, []).append(token)
+            yield token
+
+    def iter_table_tokens(self):
+        keep_tokens = self.keep_tokens
+        for token in self.table_tokens:
+            if token is None or token.type == TokenType.COMMENT:
+                continue
+            if token.type == "END":
+                return
+            if keep_tokens and token.type != TokenType.INVALID:
+                self.tokens.setdefault(token.line_num, []).append(token)
+            yield token
+
+    def read_tokens(self):
+        self.keep_tokens = True
+        for _ in self.iter_tokens():
+            pass
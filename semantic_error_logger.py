@@ -1,11 +1,12 @@
 from utils import *
-from scanner import FunctionRecordEntry
 
 
 class SemanticErrorLogger:
     def __init__(self, scanner):
         self.scanner = scanner
+        self.symbol_table = scanner.SYMBOL_TABLE["id"]
         self.errors = []
+        self.operand_types = {}
 
     def append(self, error):
         self.errors.append(error)
@@ -22,12 +23,7 @@ class SemanticErrorLogger:
     def scope_check(self, token, scope):
         if token.value == "output":
             return
-        address = None
-        for record in self.scanner.SYMBOL_TABLE["id"][::-1]:
-            if record.id == token.value and record.scope <= scope:
-                address = record.address
-                break
-        if address is None:
+        if self.symbol_table.lookup(token.value, scope) is None:
             self.errors.append(
                 f"#{token.line_num}: Semantic Error! '{token.value}' is not defined."
             )
@@ -38,16 +34,21 @@ class SemanticErrorLogger:
                 f"#{token.line_num}: Semantic Error! Illegal type of void for '{var_id}'."
             )
 
+    def define_type(self, address, var_type):
+        self.operand_types[address] = var_type
+
+    def forget_types(self, entries):
+        for entry in entries:
+            self.operand_types.pop(entry.address, None)
+
     def get_operand_type(self, operand):
         if operand.startswith("#"):
             return "int"
-        for record in self.scanner.SYMBOL_TABLE["id"]:
-            if record.address == operand:
-                return "array" if record.type == "int*" else record.type
-        return "int"
+        operand_type = self.operand_types.get(operand, "int")
+        return "array" if operand_type == "int*" else operand_type
 
-    def break_check(self, break_stack, token):
-        if len(break_stack) <= 0 or BREAK not in break_stack:
+    def break_check(self, break_frames, token):
+        if break_frames.empty():
             self.errors.append(
                 f"#{token.line_num}: Semantic Error! No 'repeat ... until' found for 'break'."
             )
@@ -83,22 +84,18 @@ class SemanticErrorLogger:
                     f" '{self.get_func_name(var)}'. Expected '{var_type}' but got 'int' instead."
                 )
         else:
-            for record in self.scanner.SYMBOL_TABLE["id"]:
-                if record.address == arg and record.type != var.type:
-                    var_type = "array" if var.type == "int*" else var.type
-                    record_type = "array" if record.type == "int*" else record.type
-                    self.errors.append(
-                        f"#{token.line_num}: Semantic Error! Mismatch in type of argument {num} of"
-                        f" '{self.get_func_name(var)}'. Expected '{var_type}' but got '{record_type}' instead."
-                    )
+            arg_type = self.operand_types.get(arg)
+            if arg_type is not None and arg_type != var.type:
+                var_type = "array" if var.type == "int*" else var.type
+                arg_type = "array" if arg_type == "int*" else arg_type
+                self.errors.append(
+                    f"#{token.line_num}: Semantic Error! Mismatch in type of argument {num} of"
+                    f" '{self.get_func_name(var)}'. Expected '{var_type}' but got '{arg_type}' instead."
+                )
 
     def get_func_name(self, var):
-        for record in self.scanner.SYMBOL_TABLE["id"]:
-            if isinstance(record, FunctionRecordEntry):
-                for arg in record.args:
-                    if arg.address == var.address:
-                        return record.id
-        return None
+        record = self.symbol_table.function_of(var.address)
+        return record.id if record is not None else None
 
     def check_type_mult(self, token, operand_1, operand_2):
         if operand_1 is None or operand_2 is None:
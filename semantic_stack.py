@@ -2,6 +2,8 @@ from utils import *
 
 
 class StackEntry:
+    __slots__ = ("value", "description")
+
     def __init__(self, value, description):
         self.value = value
         self.description = description
@@ -53,68 +55,41 @@ class SemanticStack:
         return self.__repr__()
 
 
-class ReturnStackEntry:
-    def __init__(self, func_id, index, value):
-        self.func_id = func_id
-        self.index = index
-        self.value = value
-
-    @staticmethod
-    def return_instance(func_id):
-        index = -1
-        value = RETURN
-        return ReturnStackEntry(func_id, index, value)
+class BackpatchFrame:
+    __slots__ = ("owner", "entries")
 
-    def is_return(self):
-        return self.index == -1 and self.value == RETURN
+    def __init__(self, owner=None):
+        self.owner = owner
+        self.entries = []
 
     def __repr__(self):
-        return f"{self.func_id} {self.index} {self.value}"
+        return f"{self.owner} {self.entries}"
 
     def __str__(self):
         return self.__repr__()
 
 
-class ReturnStack:
+class BackpatchStack:
     def __init__(self):
-        self.stack = []
-        self.last_return_index = -1
-
-    def push(self, func_id, index, value):
-        self.stack.append(ReturnStackEntry(func_id, index, value))
+        self.frames = []
 
-    def push_return(self, func_id):
-        self.stack.append(ReturnStackEntry.return_instance(func_id))
+    def push_frame(self, owner=None):
+        self.frames.append(BackpatchFrame(owner))
 
-    def pop(self):
-        return self.stack.pop()
+    def pop_frame(self):
+        return self.frames.pop()
 
-    def top(self, offset=0):
-        return self.stack[-1 - offset]
+    def top(self):
+        return self.frames[-1]
 
-    def last_return(self):
-        idx = len(self.stack) - 1
-        while idx >= 0:
-            if self.stack[idx].is_return():
-                self.last_return_index = idx
-                return self.stack[idx], idx
-            idx -= 1
-        return None, None
+    def add(self, entry):
+        self.frames[-1].entries.append(entry)
 
     def empty(self):
-        return len(self.stack) == 0
-
-    def __setitem__(self, key, value):
-        self.stack[key] = value
-
-    def __getitem__(self, key):
-        return self.stack[key]
+        return len(self.frames) == 0
 
     def __repr__(self):
-        return str(self.stack)
+        return str(self.frames)
 
     def __str__(self):
         return self.__repr__()
-
-    def remove_last_func(self):
-        self.stack = self.stack[: self.last_return_index]
@@ -0,0 +1,126 @@
+class SymbolTableEntry:
+    __slots__ = ("id", "type", "address", "scope")
+
+    def __init__(self, symbol_id, symbol_type, address, scope):
+        self.id = symbol_id
+        self.type = symbol_type
+        self.address = address
+        self.scope = scope
+
+    def __str__(self):
+        return f"({self.id}, {self.type}, {self.address}, {self.scope})"
+
+    def __repr__(self):
+        return str(self)
+
+
+class FunctionRecordEntry(SymbolTableEntry):
+    __slots__ = ("return_address", "return_value", "index", "args", "temp_vars")
+
+    def __init__(
+            self,
+            return_address,
+            return_value,
+            func_id,
+            index,
+            args,
+            scope,
+    ):
+        super().__init__(func_id, "function", "", scope)
+        self.return_address = return_address
+        self.return_value = return_value
+        self.index = index
+        self.args = args
+        self.temp_vars = []
+
+    @staticmethod
+    def empty_instance():
+        return FunctionRecordEntry("", "", "", "", [], -1)
+
+    def __repr__(self):
+        return f"({self.id}, {self.type}, [{self.return_value}, {self.args}, {self.return_address}, {self.index}], {self.scope})"
+
+    def __str__(self):
+        return self.__repr__()
+
+
+class SymbolTable:
+    def __init__(self):
+        self.entries = {}
+        self.names = {}
+        self.scopes = {}
+        self.functions = {}
+        self.arg_owners = {}
+        self.args = None
+
+    def append(self, entry):
+        self.entries[entry] = None
+        self.names.setdefault(entry.id, []).append(entry)
+        self.scopes.setdefault(entry.scope, []).append(entry)
+        if isinstance(entry, FunctionRecordEntry):
+            self.functions[entry] = None
+            for arg in entry.args:
+                self.arg_owners.setdefault(arg.address, entry)
+        if self.args is not None:
+            self.args.append(entry)
+
+    def remove(self, entry):
+        del self.entries[entry]
+        remove_last(self.names[entry.id], entry)
+        if entry in self.functions:
+            del self.functions[entry]
+            for arg in entry.args:
+                if self.arg_owners.get(arg.address) is entry:
+                    del self.arg_owners[arg.address]
+        if self.args and self.args[-1] is entry:
+            self.args.pop()
+
+    def pop(self):
+        entry = next(reversed(self.entries))
+        self.remove(entry)
+        remove_last(self.scopes[entry.scope], entry)
+        return entry
+
+    def pop_scope(self, scope):
+        entries = self.scopes.pop(scope, [])
+        for entry in entries:
+            self.remove(entry)
+        return entries
+
+    def lookup(self, name, scope):
+        for entry in reversed(self.names.get(name, [])):
+            if entry.scope <= scope:
+                return entry
+        return None
+
+    def last_function(self):
+        return next(reversed(self.functions), None)
+
+    def function_of(self, address):
+        return self.arg_owners.get(address)
+
+    def start_args(self):
+        self.args = []
+
+    def end_args(self):
+        args, self.args = self.args, None
+        return args
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return str(list(self.entries))
+
+    def __str__(self):
+        return self.__repr__()
+
+
+def remove_last(entries, entry):
+    for i in range(len(entries) - 1, -1, -1):
+        if entries[i] is entry:
+            del entries[i]
+            return
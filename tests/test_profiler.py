@@ -0,0 +1,35 @@
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from compiler import compile_program
+from parser_module import load_parse_table
+
+INPUT_FILE = os.path.join(ROOT, "PA3_testcases", "S3", "input.txt")
+
+
+class ProfilerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.parse_table = load_parse_table()
+
+    def test_counts_scanned_tokens(self):
+        profile = compile_program(INPUT_FILE, self.parse_table, profile=True).profile
+        self.assertGreater(profile["calls"]["scanner.get_next_token"]["count"], 0)
+
+    def test_counts_scanned_tokens_incrementally(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache_file = os.path.join(cache_dir, "incremental.cache")
+            for _ in range(2):
+                profile = compile_program(INPUT_FILE, self.parse_table, profile=True, cache_file=cache_file).profile
+                self.assertGreater(profile["calls"]["scanner.get_next_token"]["count"], 0)
+                self.assertIn("scan", profile["phases"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils import Operation
+from pb import ProgramBlock
+from vm import VMError, run_program
+
+
+def make_program(*instructions):
+    program_block = ProgramBlock()
+    for instruction in instructions:
+        program_block.emit(*instruction)
+    return program_block
+
+
+class VirtualMachineTest(unittest.TestCase):
+    def test_runs_program(self):
+        program_block = make_program(
+            (Operation.Assign, "#3", "100"),
+            (Operation.Add, "100", "#4", "104"),
+            (Operation.Print, "104"),
+        )
+        self.assertEqual(run_program(program_block), [7])
+
+    def test_negative_indirect_jump_target(self):
+        program_block = make_program(
+            (Operation.Assign, "#-1", "100"),
+            (Operation.Jp, "@100"),
+            (Operation.Print, "#1"),
+        )
+        with self.assertRaises(VMError):
+            run_program(program_block)
+
+    def test_negative_indirect_jpf_target(self):
+        program_block = make_program(
+            (Operation.Assign, "#-1", "100"),
+            (Operation.Jpf, "#0", "@100"),
+            (Operation.Print, "#1"),
+        )
+        with self.assertRaises(VMError):
+            run_program(program_block)
+
+    def test_negative_indirect_address(self):
+        program_block = make_program(
+            (Operation.Assign, "#-1", "100"),
+            (Operation.Print, "@100"),
+        )
+        with self.assertRaises(VMError):
+            run_program(program_block)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,6 @@
 from enum import Enum
-import json
-import anytree
-from anytree import Node, RenderTree
 from collections import OrderedDict
-import pickle
+import time
 
 
 class TokenType(Enum):
@@ -61,6 +58,32 @@ def write_tokens(scanner, output_file):
             f.write("\n")
 
 
+def write_parse_tree(parser, output_file):
+    from anytree import RenderTree
+
+    with open(output_file + "parse_tree.txt", "w") as f:
+        if parser.root is None:
+            return
+        for pre, fill, node in RenderTree(parser.root.to_anytree()):
+            f.write("%s%s\n" % (pre, node.name))
+
+
+def write_outputs(output_dir, semantic_errors, output, bytecode=None, profile=None):
+    start = time.perf_counter()
+    with open(output_dir + "semantic_errors.txt", "w") as f:
+        f.write(semantic_errors)
+    with open(output_dir + "output.txt", "w") as f:
+        f.write(output)
+    if bytecode is not None:
+        with open(output_dir + "output.bin", "wb") as f:
+            f.write(bytecode)
+    if profile is not None:
+        from profiler import write_report
+
+        profile["phases"]["write"] = round(time.perf_counter() - start, 6)
+        write_report(profile, output_dir + "profile.json")
+
+
 EPSILON = "epsilon"
 
 
@@ -78,6 +101,53 @@ def get_token_type(char):
     return TokenType.INVALID
 
 
+CLASS_DIGIT = 0
+CLASS_LETTER = 1
+CLASS_SYMBOL = 2
+CLASS_EQUAL = 3
+CLASS_STAR = 4
+CLASS_SIGN = 5
+CLASS_WHITESPACE = 6
+CLASS_NEWLINE = 7
+CLASS_SLASH = 8
+CLASS_INVALID = 9
+CLASS_NON_ASCII = 10
+
+TOKEN_TYPE_CLASSES = {
+    TokenType.NUM: CLASS_DIGIT,
+    TokenType.IDorKEYWORD: CLASS_LETTER,
+    TokenType.SYMBOL: CLASS_SYMBOL,
+    TokenType.WHITESPACE: CLASS_WHITESPACE,
+    TokenType.COMMENT: CLASS_SLASH,
+    TokenType.INVALID: CLASS_INVALID,
+}
+
+
+def get_char_class(char):
+    if char == "=":
+        return CLASS_EQUAL
+    if char == "*":
+        return CLASS_STAR
+    if char in ["+", "-"]:
+        return CLASS_SIGN
+    if char == "\n":
+        return CLASS_NEWLINE
+    return TOKEN_TYPE_CLASSES[get_token_type(char)]
+
+
+def can_follow_equal(char):
+    return (
+            char.isalpha()
+            or char.isdigit()
+            or get_token_type(char) == TokenType.WHITESPACE
+            or char == "/"
+    )
+
+
+CHAR_CLASSES = [get_char_class(chr(i)) if i < 128 else CLASS_NON_ASCII for i in range(256)]
+EQUAL_FOLLOWERS = [i < 128 and can_follow_equal(chr(i)) for i in range(256)]
+
+
 def get_token_type_for_grammar(token):
     if token.type == TokenType.KEYWORD:
         return str(token.value)
@@ -93,6 +163,8 @@ def print_short_comment(comment):
 
 
 def read_grammar_data():
+    import json
+
     with open("assets/data.json", "r") as f:
         data = json.load(f)
         terminals = data["terminals"]
@@ -120,108 +192,6 @@ def convert_grammar_to_rule_dict(filename):
     return rules
 
 
-class State:
-    def __init__(self, name, is_terminal=False):
-        self.name = name
-        self.is_terminal = is_terminal
-        self.ins = []
-        self.outs = []
-
-
-class Transition:
-    def __init__(self, name, start, end):
-        self.value = name
-        self.start = start
-        self.end = end
-        start.outs.append(self)
-        end.ins.append(self)
-
-
-class TransitionDiagram:
-    def __init__(self, rule):
-        self.rule = rule
-        self.lhs = rule[0]
-        self.start = State(0)
-        self.nodes = [self.start]
-        self.counter = 0
-        self.accept = State("accept", is_terminal=True)
-        self.createTD()
-
-    def createTD(self):
-        rhs = self.rule[1]
-        for expr in rhs:
-            current = self.start
-            expr_last = len(expr) - 1
-            for idx, item in enumerate(expr):
-                if idx == expr_last or item == EPSILON:
-                    Transition(item, current, self.accept)
-                else:
-                    self.counter += 1
-                    next = State(self.counter)
-                    Transition(item, current, next)
-                    self.nodes.append(next)
-                    current = next
-
-    def traverse(self, node, rule):
-        for edge in node.outs:
-            rule[-1].append(edge.value)
-            next = edge.end
-            if next is not self.accept:
-                self.traverse(next, rule)
-
-    def derive_rules(self):
-        rules = [self.lhs]
-        for next in self.start.outs:
-            rules.append([next.value])
-            self.traverse(next.end, rules)
-        return rules[0], rules[1:]
-
-
-class ActionSymbol(Enum):
-    Output = "output"
-    JpFrom = "jp_from"
-    InitRf = "init_rf"
-    Pid = "pid"
-    Pnum = "pnum"
-    Prv = "prv"
-    Parray = "parray"
-    Ptype = "ptype"
-    Pop = "pop"
-    DeclareArray = "declare_array"
-    ArrayType = "array_type"
-    DeclareFunction = "declare_function"
-    CaptureParamType = "capture_param_type"
-    DeclareId = "declare_id"
-    Declare = "declare"
-    Assign = "assign"
-    OpExec = "op_exec"
-    OpPush = "op_push"
-    Hold = "hold"
-    Label = "label"
-    Decide = "decide"
-    JpfRepeat = "jpf_repeat"
-    FunctionCall = "function_call"
-    FunctionReturn = "function_return"
-    ArgInit = "arg_init"
-    ArgFinish = "arg_finish"
-    ArgPass = "arg_pass"
-    FunctionScope = "function_scope"
-    ContainerScope = "container_scope"
-    TemporaryScope = "temporary_scope"
-    SimpleScope = "simple_scope"
-    ScopeStart = "scope_start"
-    ScopeEnd = "scope_end"
-    Prison = "prison"
-    PrisonBreak = "prison_break"
-    ExecMain = "exec_main"
-    SetMainRa = "set_main_ra"
-    CheckDeclarationType = "check_declaration_type"
-    CheckInContainer = "check_in_container"
-
-    def __str__(self) -> str:
-        return f"#{self.value}"
-
-
 class Operation(Enum):
     Add = "ADD"
     Mult = "MULT"
@@ -252,10 +222,3 @@ OPERATIONS = {
     "==": Operation.Eq,
     "<": Operation.Lt,
 }
-
-RETURN = "RETURN"
-BREAK = "BREAK"
-
-
-def last_index_of(lst, item):
-    return len(lst) - 1 - lst[::-1].index(item)
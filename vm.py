@@ -0,0 +1,209 @@
+from utils import *
+from pb import OPERATION_CODES
+from array import array
+import sys
+
+IMMEDIATE = 0
+DIRECT = 1
+INDIRECT = 2
+
+ADD = 0
+SUB = 1
+MULT = 2
+EQ = 3
+LT = 4
+ASSIGN = 5
+JPF = 6
+JP = 7
+PRINT = 8
+
+OPCODES = {
+    Operation.Add: ADD,
+    Operation.Sub: SUB,
+    Operation.Mult: MULT,
+    Operation.Eq: EQ,
+    Operation.Lt: LT,
+    Operation.Assign: ASSIGN,
+    Operation.Jpf: JPF,
+    Operation.Jp: JP,
+    Operation.Print: PRINT,
+}
+
+INT_MIN = -(1 << 31)
+
+
+class VMError(Exception):
+    pass
+
+
+def decode_operand(operand):
+    operand = str(operand).strip()
+    if operand == "":
+        return IMMEDIATE, 0
+    if operand.startswith("#"):
+        return IMMEDIATE, int(operand[1:])
+    if operand.startswith("@"):
+        return INDIRECT, int(operand[1:])
+    return DIRECT, int(operand)
+
+
+def check_address(address):
+    if address < 0:
+        raise IndexError(f"invalid memory address {address}")
+    return address
+
+
+def wrap_int(value):
+    return (value - INT_MIN) % (1 << 32) + INT_MIN
+
+
+class VirtualMachine:
+    def __init__(self, program_block):
+        operands = [decode_operand(operand) for operand in program_block.operands]
+        opcodes = [OPCODES.get(operation) for operation in OPERATION_CODES]
+        self.code = []
+        for pc, (operation, arg1, arg2, result) in enumerate(
+                zip(program_block.operations, program_block.args1, program_block.args2, program_block.results)
+        ):
+            if opcodes[operation] is None:
+                raise VMError(f"cannot execute {program_block[pc]} at {pc}")
+            self.code.append((opcodes[operation],) + operands[arg1] + operands[arg2] + operands[result])
+        highest = max((value for mode, value in operands if mode != IMMEDIATE), default=0)
+        self.memory = array("i", bytes(4 * (highest + 4)))
+        self.outputs = []
+        self.steps = 0
+
+    def load(self, mode, value):
+        if mode == IMMEDIATE:
+            return value
+        if mode == INDIRECT:
+            value = self.load(DIRECT, value)
+        if value < 0:
+            raise VMError(f"invalid memory address {value}")
+        if value >= len(self.memory):
+            return 0
+        return self.memory[value]
+
+    def store(self, mode, address, value):
+        if mode == INDIRECT:
+            address = self.load(DIRECT, address)
+        if address < 0:
+            raise VMError(f"invalid memory address {address}")
+        if address >= len(self.memory):
+            self.memory.extend(bytes(4 * (address + 1 - len(self.memory) + len(self.memory) // 2)))
+        self.memory[address] = wrap_int(value)
+
+    def jump_target(self, mode, value):
+        target = self.load(DIRECT, value) if mode == INDIRECT else value
+        if target < 0:
+            raise VMError(f"invalid jump target {target}")
+        return target
+
+    def step(self, pc):
+        opcode, m1, v1, m2, v2, m3, v3 = self.code[pc]
+        if opcode == JP:
+            return self.jump_target(m1, v1)
+        if opcode == JPF:
+            return pc + 1 if self.load(m1, v1) else self.jump_target(m2, v2)
+        if opcode == PRINT:
+            self.outputs.append(self.load(m1, v1))
+        elif opcode == ASSIGN:
+            self.store(m2, v2, self.load(m1, v1))
+        else:
+            a, b = self.load(m1, v1), self.load(m2, v2)
+            if opcode == ADD:
+                result = a + b
+            elif opcode == SUB:
+                result = a - b
+            elif opcode == MULT:
+                result = a * b
+            elif opcode == EQ:
+                result = int(a == b)
+            else:
+                result = int(a < b)
+            self.store(m3, v3, result)
+        return pc + 1
+
+    def run(self, max_steps=None):
+        code = self.code
+        memory = self.memory
+        outputs = self.outputs
+        end = len(code)
+        budget = start = max_steps if max_steps is not None else -1
+        pc = 0
+        while pc < end and budget != 0:
+            budget -= 1
+            try:
+                opcode, m1, v1, m2, v2, m3, v3 = code[pc]
+                if opcode == ASSIGN:
+                    a = v1 if m1 == IMMEDIATE else memory[v1] if m1 == DIRECT else memory[check_address(memory[v1])]
+                    if m2 == DIRECT:
+                        memory[v2] = a
+                    else:
+                        memory[check_address(memory[v2])] = a
+                    pc += 1
+                elif opcode <= LT:
+                    a = v1 if m1 == IMMEDIATE else memory[v1] if m1 == DIRECT else memory[check_address(memory[v1])]
+                    b = v2 if m2 == IMMEDIATE else memory[v2] if m2 == DIRECT else memory[check_address(memory[v2])]
+                    if opcode == ADD:
+                        a = a + b
+                    elif opcode == SUB:
+                        a = a - b
+                    elif opcode == MULT:
+                        a = a * b
+                    elif opcode == EQ:
+                        a = 1 if a == b else 0
+                    else:
+                        a = 1 if a < b else 0
+                    if m3 == DIRECT:
+                        memory[v3] = a
+                    else:
+                        memory[check_address(memory[v3])] = a
+                    pc += 1
+                elif opcode == JP:
+                    pc = check_address(v1 if m1 != INDIRECT else memory[v1])
+                elif opcode == JPF:
+                    a = v1 if m1 == IMMEDIATE else memory[v1] if m1 == DIRECT else memory[check_address(memory[v1])]
+                    if a:
+                        pc += 1
+                    else:
+                        pc = check_address(v2 if m2 != INDIRECT else memory[v2])
+                else:
+                    outputs.append(v1 if m1 == IMMEDIATE else memory[v1] if m1 == DIRECT else memory[check_address(memory[v1])])
+                    pc += 1
+            except (IndexError, OverflowError):
+                pc = self.step(pc)
+                memory = self.memory
+        self.steps = start - budget
+        return outputs
+
+    def write_outputs(self, output=sys.stdout):
+        for value in self.outputs:
+            output.write(f"PRINT    {value}\n")
+
+
+def run_program(program_block, max_steps=None):
+    return VirtualMachine(program_block).run(max_steps)
+
+
+if __name__ == "__main__":
+    from scanner import Scanner, CHUNK_SIZE
+    from parser_module import Parser, load_parse_table
+    from bytecode import read_program
+
+    if len(sys.argv) > 1 and sys.argv[1].endswith(".bin"):
+        program_block = read_program(sys.argv[1])
+    else:
+        input_dir = sys.argv[1] + "/" if len(sys.argv) > 1 else ""
+        scanner = Scanner(input_dir + "input.txt", chunk_size=CHUNK_SIZE)
+        parse_table = load_parse_table()
+        parser = Parser(scanner, parse_table.rule_dict, parse_table, build_tree=False)
+        parser.parse()
+        if not parser.code_generator.error_logger.empty():
+            for error in parser.code_generator.error_logger:
+                print(error)
+            sys.exit(1)
+        program_block = parser.code_generator.program_block
+    vm = VirtualMachine(program_block)
+    vm.run(int(sys.argv[2]) if len(sys.argv) > 2 else None)
+    vm.write_outputs()